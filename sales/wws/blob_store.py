@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+内容寻址图片存储 - 文件按SHA-256命名，相同内容跨周、跨商店只保存一份
+"""
+
+import os
+import shutil
+import hashlib
+import logging
+from config import BLOB_STORE_CONFIG
+
+
+def resolve_blob_root():
+    """blob根目录，相对路径按爬虫目录解析"""
+    root = BLOB_STORE_CONFIG['root']
+    if not os.path.isabs(root):
+        root = os.path.join(os.path.dirname(os.path.abspath(__file__)), root)
+    return os.path.normpath(root)
+
+
+class BlobStore:
+    def __init__(self, root=None, url_prefix=None):
+        self.root = root or resolve_blob_root()
+        self.url_prefix = url_prefix or BLOB_STORE_CONFIG['url_prefix']
+        os.makedirs(self.root, exist_ok=True)
+
+    def _relative_path(self, key, ext):
+        # 按哈希前两位分目录，避免单目录文件过多
+        return f"{key[:2]}/{key}.{ext}"
+
+    def path_for(self, key, ext='jpg'):
+        """blob在本地磁盘上的路径"""
+        return os.path.join(self.root, *self._relative_path(key, ext).split('/'))
+
+    def url_for(self, key, ext='jpg'):
+        """写入数据库、供API直接返回的访问路径"""
+        return f"{self.url_prefix}/{self._relative_path(key, ext)}"
+
+    def exists(self, key, ext='jpg'):
+        return os.path.exists(self.path_for(key, ext))
+
+    def _write(self, key, ext, writer):
+        """已存在则跳过；否则写临时文件后原子改名，返回是否新写入"""
+        path = self.path_for(key, ext)
+        if os.path.exists(path):
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        writer(temp_path)
+        os.replace(temp_path, path)
+        return True
+
+    def put(self, data, ext='jpg'):
+        """保存字节数据，返回 (key, 是否新写入)"""
+        key = hashlib.sha256(data).hexdigest()
+
+        def writer(temp_path):
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+
+        created = self._write(key, ext, writer)
+        if not created:
+            logging.debug(f"blob已存在，复用: {key}")
+        return key, created
+
+    def put_file(self, file_path, ext='jpg'):
+        """保存已有文件（分块计算哈希，不整体读入内存），返回 (key, 是否新写入)"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        key = digest.hexdigest()
+        created = self._write(key, ext, lambda temp_path: shutil.copyfile(file_path, temp_path))
+        return key, created
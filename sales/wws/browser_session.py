@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+常驻浏览器会话 - 缓存chromedriver路径，跨定时任务复用常驻Chrome进程；
+并发的商店各自独占一个浏览器（在独立标签页中运行），一家卡住或超时被关闭不影响其他商店
+"""
+
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+from config import COLES_CONFIG, BROWSER_CONFIG
+from download_cache import resolve_cache_dir
+
+
+class WarmBrowser:
+    """一个常驻Chrome进程：基础标签页和已复用次数"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.base_handle = driver.current_window_handle
+        self.uses = 0
+        self.killed = False  # 截止时间到后被强制结束
+
+
+class BrowserSessionManager:
+    def __init__(self, headless=True):
+        self.headless = headless
+        self.idle = []  # 空闲的常驻浏览器，跨运行复用
+        self.busy = set()  # 正被某家商店独占使用的浏览器
+        self.cache_file = os.path.join(resolve_cache_dir('browser'), 'chromedriver.json')
+        self._lock = threading.Lock()
+        self._driver_lock = threading.Lock()  # 串行解析/写入chromedriver路径缓存
+        self.stats = {'cold_starts': 0, 'cold_time': 0.0, 'warm_starts': 0, 'warm_time': 0.0, 'crashes': 0}
+
+    def _cached_driver_path(self):
+        """读取缓存的chromedriver路径，过期或文件不存在时返回None"""
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        max_age = BROWSER_CONFIG['driver_cache_days'] * 86400
+        if time.time() - cached.get('resolved_at', 0) > max_age or not os.path.exists(cached.get('path', '')):
+            return None
+        return cached['path']
+
+    def _resolve_driver_path(self, refresh=False):
+        """优先用缓存路径，避免每次联网查询驱动版本"""
+        with self._driver_lock:
+            path = None if refresh else self._cached_driver_path()
+            if path:
+                return path
+            path = ChromeDriverManager().install()
+            with open(self.cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'path': path, 'resolved_at': time.time()}, f)
+            logging.info(f"chromedriver已解析并缓存: {path}")
+            return path
+
+    def _build_options(self):
+        chrome_options = Options()
+        if self.headless:
+            chrome_options.add_argument('--headless')  # 无头模式
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920,1080')
+        chrome_options.add_argument(f"--user-agent={COLES_CONFIG['user_agent']}")
+        return chrome_options
+
+    def _start(self):
+        """冷启动Chrome；缓存的驱动与浏览器版本不匹配时重新解析一次"""
+        try:
+            service = Service(self._resolve_driver_path())
+            driver = webdriver.Chrome(service=service, options=self._build_options())
+        except WebDriverException as e:
+            logging.warning(f"使用缓存的chromedriver启动失败，重新解析驱动: {e}")
+            service = Service(self._resolve_driver_path(refresh=True))
+            driver = webdriver.Chrome(service=service, options=self._build_options())
+        driver.implicitly_wait(BROWSER_CONFIG['implicit_wait'])
+        return WarmBrowser(driver)
+
+    def _is_alive(self, browser):
+        if browser.killed:
+            return False
+        try:
+            return bool(browser.driver.window_handles)
+        except WebDriverException:
+            return False
+
+    def _discard(self, browser):
+        """退出浏览器进程（忽略已崩溃时的错误）"""
+        with self._lock:
+            self.busy.discard(browser)
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+
+    def _kill(self, browser, label=''):
+        """截止时间到：标记并在后台退出该商店独占的浏览器，卡住的WebDriver调用随之出错返回"""
+        browser.killed = True
+        logging.warning(f"{label} 已超时，强制关闭其浏览器")
+        threading.Thread(target=self._discard, args=(browser,), daemon=True).start()
+
+    def acquire(self):
+        """独占一个可用的浏览器：优先复用空闲的常驻进程，超过使用次数或已崩溃则重启，没有空闲的就新启动一个"""
+        started = time.perf_counter()
+        browser = None
+        while True:
+            with self._lock:
+                candidate = self.idle.pop() if self.idle else None
+            if candidate is None:
+                break
+            if not self._is_alive(candidate):
+                logging.warning("常驻浏览器已失去响应，重新启动")
+                self.stats['crashes'] += 1
+                self._discard(candidate)
+            elif candidate.uses >= BROWSER_CONFIG['max_uses']:
+                logging.info(f"浏览器已使用 {candidate.uses} 次，回收重启")
+                self._discard(candidate)
+            else:
+                browser = candidate
+                break
+
+        if browser:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.stats['warm_starts'] += 1
+                self.stats['warm_time'] += elapsed
+            logging.info(f"复用常驻Chrome浏览器(热启动)，耗时 {elapsed * 1000:.0f} ms")
+        else:
+            browser = self._start()
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.stats['cold_starts'] += 1
+                self.stats['cold_time'] += elapsed
+            logging.info(f"Chrome浏览器启动成功(冷启动)，耗时 {elapsed:.2f} s")
+
+        browser.uses += 1
+        with self._lock:
+            self.busy.add(browser)
+        return browser
+
+    def release(self, browser):
+        """用完归还：仍然可用时放回空闲列表（最多保留 max_idle 个），否则退出"""
+        with self._lock:
+            self.busy.discard(browser)
+            keep = len(self.idle) < BROWSER_CONFIG['max_idle']
+        if keep and self._is_alive(browser):
+            with self._lock:
+                self.idle.append(browser)
+        else:
+            self._discard(browser)
+
+    @contextmanager
+    def tab(self, label='', deadline=None):
+        """为一家商店独占一个浏览器并打开独立标签页，用完关闭并归还；每次都经 acquire() 检查，崩溃过的浏览器先重启
+
+        调用方只能使用这里 yield 的 driver，不要缓存。deadline（有 remaining/on_expire/forget 的截止时间）
+        限制页面加载和脚本超时，到期时强制关闭这个浏览器，不影响其他商店
+        """
+        browser = self.acquire()
+        driver = browser.driver
+        kill = lambda: self._kill(browser, label)  # noqa: E731
+        try:
+            timeout = BROWSER_CONFIG['page_load_timeout']
+            if deadline:
+                timeout = max(1, min(timeout, deadline.remaining()))
+                deadline.on_expire(kill)
+            driver.set_page_load_timeout(timeout)
+            driver.set_script_timeout(timeout)
+            driver.switch_to.new_window('tab')
+            yield driver
+        except WebDriverException:
+            if not self._is_alive(browser):
+                logging.warning(f"{label} 标签页运行中浏览器崩溃或被关闭，下次使用时重启")
+                if not browser.killed:
+                    self.stats['crashes'] += 1
+            raise
+        finally:
+            if deadline:
+                deadline.forget(kill)  # 之后截止时间到也不会再关闭这个（可能已被其他商店复用的）浏览器
+            if self._is_alive(browser):
+                try:
+                    if driver.current_window_handle != browser.base_handle:
+                        driver.close()
+                    driver.switch_to.window(browser.base_handle)
+                except WebDriverException:
+                    browser.killed = True
+            self.release(browser)
+
+    def shutdown(self):
+        """关闭所有浏览器并输出冷/热启动统计"""
+        with self._lock:
+            browsers = self.idle + list(self.busy)
+            self.idle = []
+        for browser in browsers:
+            self._discard(browser)
+        if browsers:
+            logging.info(f"已关闭 {len(browsers)} 个浏览器")
+        self.log_stats()
+
+    def log_stats(self):
+        stats = self.stats
+        cold_avg = stats['cold_time'] / stats['cold_starts'] if stats['cold_starts'] else 0
+        warm_avg = stats['warm_time'] / stats['warm_starts'] if stats['warm_starts'] else 0
+        logging.info(
+            f"浏览器会话: 冷启动 {stats['cold_starts']} 次(平均 {cold_avg:.2f} s), "
+            f"热启动 {stats['warm_starts']} 次(平均 {warm_avg * 1000:.0f} ms), 崩溃 {stats['crashes']} 次"
+        )
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_browser_session(headless=True):
+    """获取进程内共享的浏览器会话，进程退出时自动关闭浏览器"""
+    with _sessions_lock:
+        if headless not in _sessions:
+            session = BrowserSessionManager(headless=headless)
+            atexit.register(session.shutdown)
+            _sessions[headless] = session
+        return _sessions[headless]
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+目录PDF发现 - 先用HTTP直接抓取页面并解析HTML/内嵌JSON，失败时才回退到浏览器
+
+离线调试保存下来的页面:
+    python catalogue_discovery.py coles.html https://www.coles.com.au/catalogues "This week's catalogue"
+离线测试（tests/fixtures 中保存的页面）:
+    python -m unittest discover -s tests
+"""
+
+import re
+import sys
+import time
+import logging
+from collections import namedtuple
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from http_client import get_http_client
+
+try:
+    import lxml  # noqa: F401  可选依赖，解析速度明显快于内置解析器
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+# PDF链接: 地址、链接文字、由近到远的祖先容器文字、来源(anchor/script)
+PdfLink = namedtuple('PdfLink', ['url', 'text', 'context', 'source'])
+
+# 脚本/JSON状态里的PDF地址，兼容 "https:\/\/..." 和 / 转义写法
+SCRIPT_PDF_PATTERN = re.compile(
+    r'https?:(?:\\?/|\\u002[fF]){2}[^"\'\s<>]+?\.pdf(?:\?[^"\'\s<>\\]*)?',
+    re.IGNORECASE
+)
+
+# 向上取容器文字的层数和长度上限（与浏览器端提取保持一致）
+CONTEXT_LEVELS = 10
+CONTEXT_LIMIT = 500
+
+
+def _unescape_script_url(url):
+    return url.replace('\\u002F', '/').replace('\\u002f', '/').replace('\\/', '/')
+
+
+def _anchor_context(anchor):
+    """由近到远收集祖先容器文字，超过 CONTEXT_LIMIT 字（已到整页级别）时停止"""
+    context = []
+    parent = anchor.parent
+    for _ in range(CONTEXT_LEVELS):
+        if parent is None or parent.name in ('body', 'html', '[document]'):
+            break
+        text = parent.get_text(' ', strip=True)
+        if len(text) > CONTEXT_LIMIT:
+            break
+        context.append(text)
+        parent = parent.parent
+    return tuple(context)
+
+
+def extract_pdf_links(html, base_url):
+    """从HTML中提取所有PDF链接，按文档顺序去重"""
+    soup = BeautifulSoup(html, HTML_PARSER)
+    links = []
+    seen = set()
+
+    for anchor in soup.find_all('a', href=True):
+        url = urljoin(base_url, anchor['href'])
+        if '.pdf' not in url.lower() or url in seen:
+            continue
+        seen.add(url)
+        links.append(PdfLink(url, anchor.get_text(' ', strip=True), _anchor_context(anchor), 'anchor'))
+
+    for script in soup.find_all('script'):
+        text = script.string or script.get_text()
+        for match in SCRIPT_PDF_PATTERN.findall(text):
+            url = _unescape_script_url(match)
+            if url in seen:
+                continue
+            seen.add(url)
+            links.append(PdfLink(url, '', (), 'script'))
+
+    return links
+
+
+def rank_pdf_links(links, preferred_text=None):
+    """排序：越近的容器含指定文字越优先 > 链接文字含download > 页面上的<a> > 脚本里的地址，同分保持文档顺序"""
+    preferred = preferred_text.lower() if preferred_text else None
+
+    def score(link):
+        level = CONTEXT_LEVELS
+        if preferred:
+            level = next(
+                (index for index, text in enumerate(link.context) if preferred in text.lower()),
+                CONTEXT_LEVELS
+            )
+        value = 0
+        if 'download' in link.text.lower():
+            value += 2
+        if link.source == 'anchor':
+            value += 1
+        return level, -value
+
+    return sorted(links, key=score)
+
+
+class CatalogueDiscovery:
+    def __init__(self, http_client=None):
+        self.http = http_client or get_http_client()
+
+    def discover_http(self, page_url, preferred_text=None):
+        """HTTP快速路径：抓取页面并解析，返回排序后的PDF链接列表"""
+        response = self.http.get(page_url)
+        if response.status_code != 200:
+            logging.info(f"HTTP抓取目录页失败: HTTP {response.status_code}")
+            return []
+        return rank_pdf_links(extract_pdf_links(response.text, page_url), preferred_text)
+
+    def discover(self, store_name, page_url, browser_fallback=None, preferred_text=None):
+        """先走HTTP快速路径，找不到PDF时调用 browser_fallback()"""
+        started = time.perf_counter()
+        try:
+            links = self.discover_http(page_url, preferred_text)
+            if links:
+                elapsed = time.perf_counter() - started
+                logging.info(f"{store_name} HTTP快速发现PDF({elapsed * 1000:.0f} ms): {links[0].url}")
+                return links[0].url
+            logging.info(f"{store_name} 页面HTML中没有PDF链接，回退到浏览器")
+        except Exception as e:
+            logging.info(f"{store_name} HTTP快速发现失败，回退到浏览器: {e}")
+
+        if not browser_fallback:
+            return None
+
+        fallback_started = time.perf_counter()
+        pdf_url = browser_fallback()
+        logging.info(f"{store_name} 浏览器发现耗时 {time.perf_counter() - fallback_started:.2f} s")
+        return pdf_url
+
+
+def main():
+    """离线解析保存的HTML文件，打印排序后的PDF链接"""
+    if len(sys.argv) < 3:
+        print("用法: python catalogue_discovery.py <html文件> <页面URL> [优先匹配文字]")
+        return
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        html = f.read()
+    preferred_text = sys.argv[3] if len(sys.argv) > 3 else None
+    for link in rank_pdf_links(extract_pdf_links(html, sys.argv[2]), preferred_text):
+        context = link.context[-1][:80] if link.context else ''
+        print(f"[{link.source}] {link.url}  {link.text}  | {context}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+目录版本目录 - 每次发布写入 {商店}/versions/{版本号}/，校验通过后才原子切换 current 指针
+（current 符号链接 + current_version 文件 + 数据库 version 列），读者不会看到写了一半的目录；
+复用旧版本或去重引用的页面也链接进新版本目录，每个版本目录都是完整的；超过保留期且不再被引用的旧版本由 collect_garbage 清理
+"""
+
+import os
+import time
+import shutil
+import logging
+from datetime import date, datetime, timedelta
+from PIL import Image
+from config import VERSION_CONFIG
+
+VERSIONS_DIR = 'versions'
+CURRENT_LINK = 'current'
+CURRENT_FILE = 'current_version'
+
+
+def new_version_id(sha256):
+    """版本号: 生成时间 + PDF内容哈希前缀，如 20250605T100012-3fa9c1d2"""
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{sha256[:8]}"
+
+
+class CatalogueVersions:
+    def __init__(self, store_dir, url_prefix):
+        """store_dir: 商店图片根目录；url_prefix: 对应的访问路径，如 /catalogue_images/coles"""
+        self.store_dir = store_dir
+        self.url_prefix = url_prefix
+        self.versions_root = os.path.join(store_dir, VERSIONS_DIR)
+        os.makedirs(self.versions_root, exist_ok=True)
+
+    def version_dir(self, version):
+        return os.path.join(self.versions_root, version)
+
+    def version_url(self, version):
+        return f"{self.url_prefix}/{VERSIONS_DIR}/{version}"
+
+    def create(self, version):
+        """新建暂存目录；current 指针切换前没有任何读者引用它"""
+        path = self.version_dir(version)
+        os.makedirs(path)
+        return path
+
+    def discard(self, version, db):
+        """发布失败时删除暂存目录及其中图片已写入的派生图/哈希记录"""
+        shutil.rmtree(self.version_dir(version), ignore_errors=True)
+        db.purge_image_prefix(f"{self.version_url(version)}/")
+        logging.info(f"已丢弃未发布的版本 {version}")
+
+    def include(self, version, files):
+        """files: {文件名: 本地文件}，把增量复用、去重引用的其他版本/商店的页面硬链接（跨文件系统时复制）
+        进版本目录，使每个版本目录都是完整的一本目录；已存在的文件跳过，返回新加入的文件数"""
+        added = 0
+        for filename, source in files.items():
+            target = os.path.join(self.version_dir(version), filename)
+            if os.path.exists(target):
+                continue
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copy2(source, target)
+            added += 1
+        return added
+
+    def current(self):
+        try:
+            with open(os.path.join(self.store_dir, CURRENT_FILE), 'r', encoding='utf-8') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def validate(self, files):
+        """files: 本次目录引用的所有本地图片文件，全部存在、非空且能解码才算有效"""
+        if not files:
+            return False
+        for file_path in files:
+            try:
+                if os.path.getsize(file_path) == 0:
+                    raise ValueError("空文件")
+                with Image.open(file_path) as image:
+                    image.verify()
+            except Exception as e:
+                logging.error(f"版本校验失败 {file_path}: {e}")
+                return False
+        return True
+
+    def flip(self, version):
+        """原子切换 current：先建临时符号链接/文件，再 rename 覆盖"""
+        link_path = os.path.join(self.store_dir, CURRENT_LINK)
+        temp_link = f"{link_path}.tmp"
+        try:
+            if os.path.lexists(temp_link):
+                os.remove(temp_link)
+            os.symlink(os.path.join(VERSIONS_DIR, version), temp_link)
+            os.replace(temp_link, link_path)
+        except OSError as e:
+            logging.warning(f"current 符号链接切换失败（仅更新版本文件）: {e}")
+
+        pointer_path = os.path.join(self.store_dir, CURRENT_FILE)
+        temp_pointer = f"{pointer_path}.tmp"
+        with open(temp_pointer, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(temp_pointer, pointer_path)
+        logging.info(f"{os.path.basename(self.store_dir)} 当前版本切换为 {version}")
+
+    def restore(self, version):
+        """把 current 指回发布前的版本；version 为None表示之前还是平铺目录，删除 current 指针"""
+        if version:
+            self.flip(version)
+            return
+        for name in (CURRENT_LINK, CURRENT_FILE):
+            path = os.path.join(self.store_dir, name)
+            if os.path.lexists(path):
+                os.remove(path)
+        logging.info(f"{os.path.basename(self.store_dir)} 已恢复为未版本化的平铺目录")
+
+    def collect_garbage(self, db):
+        """删除超过保留期、不是当前版本、没有当前目录行引用、也没有历史保留期内的历史目录引用的旧版本目录；
+        回收后删除仍引用其中图片的更早的历史目录，历史查询不会返回失效的图片路径"""
+        current = self.current()
+        versions = sorted(os.listdir(self.versions_root), reverse=True)
+        cutoff = time.time() - VERSION_CONFIG['retention_days'] * 86400
+        history_since = date.today() - timedelta(days=VERSION_CONFIG['history_days'])
+        removed = 0
+        for index, version in enumerate(versions):
+            path = self.version_dir(version)
+            if version == current or index < VERSION_CONFIG['keep_versions'] or os.path.getmtime(path) > cutoff:
+                continue
+            prefix = f"{self.version_url(version)}/"
+            if db.count_image_references(prefix):
+                continue  # 增量复用或去重的页面仍引用该版本中的图片
+            if db.count_history_references(prefix, history_since):
+                continue  # 历史保留期内的往期目录仍引用该版本中的图片
+            shutil.rmtree(path, ignore_errors=True)
+            db.purge_image_prefix(prefix)
+            pruned = db.prune_history(prefix)
+            removed += 1
+            logging.info(f"回收旧版本目录: {path}（删除引用它的历史目录 {pruned} 期）")
+        return removed
@@ -8,6 +8,16 @@ DB_CONFIG = {
     'charset': 'utf8mb4'
 }
 
+# 数据库连接池配置
+DB_POOL_CONFIG = {
+    'pool_name': 'scraper_pool',
+    'pool_size': 5,  # 连接池大小
+    'acquire_timeout': 10,  # 池满时等待空闲连接的最长秒数
+    'health_check': True,  # 借出连接前先ping检查
+    'reconnect_attempts': 3,  # 连接断开后的重连次数
+    'reconnect_delay': 1  # 每次重连间隔秒数
+}
+
 # Coles网站配置
 COLES_CONFIG = {
     'base_url': 'https://www.coles.com.au',
@@ -15,13 +25,149 @@ COLES_CONFIG = {
     'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
 }
 
+# Woolworths网站配置
+WOOLWORTHS_CONFIG = {
+    'base_url': 'https://www.woolworths.com.au',
+    'catalogue_url': 'https://www.woolworths.com.au/shop/catalogue'
+}
+
+# 需要爬取的商店列表：新增商店（如Aldi、IGA）只需在这里加一项
+# 可选 timeout/retries 覆盖 ORCHESTRATOR_CONFIG 中的默认值
+STORES = [
+    {
+        'name': 'coles',
+        'catalogue_url': COLES_CONFIG['catalogue_url'],
+        'preferred_text': "This week's catalogue",  # 优先选择该文字所在区域内的PDF
+        'region': 'NSW',  # 目录所属地区，写入目录头表
+        'dpi_overrides': {},  # {页码: DPI}，价格表等密集页单独提高清晰度
+        'enabled': True
+    },
+    {
+        'name': 'woolworths',
+        'catalogue_url': WOOLWORTHS_CONFIG['catalogue_url'],
+        'preferred_text': None,
+        'region': 'NSW',  # 按邮编2000（悉尼）选择的地区目录
+        'dpi_overrides': {},
+        'enabled': True
+    }
+]
+
+# 多商店并发调度配置
+ORCHESTRATOR_CONFIG = {
+    'max_workers': 4,  # 同时处理的商店数
+    'store_timeout': 900,  # 单家商店的总超时秒数（含重试），到期后在下一个阶段前停止，不再发布
+    'cancel_grace': 60,  # 超时后等待商店停止并恢复上一期目录的秒数
+    'store_retries': 1,  # 单家商店失败后的重试次数
+    'retry_delay': 30,  # 重试前等待秒数
+    'poll_interval': 1  # 检查各商店进度的间隔秒数
+}
+
 # 爬虫配置
 SCRAPER_CONFIG = {
     'timeout': 30,
     'retry_times': 3,
     'delay_between_requests': 2,
-    'image_quality': 85,  # JPEG质量
-    'max_image_size': (1200, 800)  # 最大图片尺寸
+    'image_quality': 85,  # 固定JPEG质量（关闭预算编码时使用，也是预算编码的对比基准）
+    'max_image_size': (1200, 800),  # 最大图片尺寸（横版页；竖版页自动调换为 800x1200）
+    'render_dpi': 150,  # 固定PDF渲染DPI（关闭 adaptive_dpi 或无法读取页面尺寸时使用）
+    'adaptive_dpi': True,  # 按每页媒体框计算正好达到 max_image_size 的DPI
+    'min_render_dpi': 36,  # 自适应DPI下限
+    'max_render_dpi': 300,  # 自适应DPI上限
+    'render_window': 2,  # 流式渲染时同时解码的最大页数
+    'render_workers': 4,  # 并行渲染进程数，1 表示单进程
+    'render_chunk_size': 4,  # 每个渲染任务负责的连续页数
+    'renderer': 'auto',  # 渲染后端: poppler / pdfium / auto（使用 renderers.py 校准结果，未校准时为poppler）
+    'renderer_calibration_pages': 4,  # 校准时参与计时的页数
+    'render_mode': 'direct',  # poppler后端 direct: 直接按最终质量写JPEG；pil: 解码后由PIL重新编码
+    'render_progressive': True,  # 直出模式的JPEG是否渐进式
+    'render_compare_pages': 2,  # 直出模式下抽样用PIL方式重渲染的页数，用于估算节省的时间和字节，0 关闭
+    'images_root': '../public/catalogue_images',  # 本地图片根目录（相对爬虫目录），每家商店一个子目录
+    'images_url_prefix': '/catalogue_images',  # 写入数据库的图片访问路径前缀
+    'cache_dir': '.cache',  # 本地缓存目录（相对爬虫目录）
+    'download_chunk_size': 256 * 1024,  # 流式下载每块字节数
+    'download_resume_attempts': 3,  # 下载中断后断点续传的最大次数
+    'catalogue_start_weekday': 2,  # 每周目录的生效日（0=周一，2=周三）
+    'catalogue_valid_days': 7  # 每期目录的有效天数
+}
+
+# 渐进发布：封面先渲染并上线，其余页按页序分批提交，读者无需等整本渲染完成；商店可用 'progressive' 单独开关
+PROGRESSIVE_CONFIG = {
+    'enabled': True,
+    'first_batch_pages': 1,  # 第一批（封面）页数
+    'batch_size': 8  # 之后每批提交的页数
+}
+
+# 页面JPEG预算编码：二分查找满足PSNR阈值的最低质量，超出字节预算时取预算内最高质量
+ENCODER_CONFIG = {
+    'enabled': True,
+    'max_bytes': 150 * 1024,  # 每页字节预算
+    'min_psnr': 38.0,  # 感知质量阈值(dB)，纯文字页通常在较低质量就能达到
+    'min_quality': 40,
+    'max_quality': 90,
+    'progressive': True,
+    'subsampling': [0, 2],  # 逐页比较的色度抽样: 0=4:4:4, 2=4:2:0
+    'measure_baseline': True  # 每页额外按旧方式（固定质量、非渐进、不优化）编码一次，用于报告节省的字节
+}
+
+# 多尺寸派生图配置：每页按规格生成 JPEG（及可选 WebP），客户端取最小的合适版本
+DERIVATIVE_CONFIG = {
+    'variants': [
+        {'name': 'thumb', 'width': 240},  # 列表/缩略图
+        {'name': 'mobile', 'width': 750},  # 小程序全屏宽度
+        {'name': 'full', 'max_size': SCRAPER_CONFIG['max_image_size']}  # 放大查看，横竖页自动调换
+    ],
+    'webp': True,  # 同时输出WebP
+    'webp_quality': 80,
+    'progressive': True  # JPEG使用渐进式编码
+}
+
+# 深度缩放瓦片配置（可选输出阶段）
+TILE_CONFIG = {
+    'enabled': False,  # 是否为每页生成DZI瓦片金字塔
+    'dpi': 300,  # 最高层的渲染DPI
+    'tile_size': 256,  # 瓦片边长（像素）
+    'quality': 80,  # 瓦片JPEG质量
+    'direct_level_limit': 1024  # 长边不超过该值的层整层渲染一次后缩小，不再分带
+}
+
+# 感知哈希去重配置
+PHASH_CONFIG = {
+    'enabled': True,  # 渲染后按dHash查找已有的相同页面
+    'max_distance': 4,  # 64位dHash汉明距离不超过该值的页面作为候选
+    'verify_width': 256,  # 候选复核时缩小到的宽度
+    'max_pixel_delta': 16  # 复核时灰度差最大值不超过该值才视为同一页面（价格改动会超过）
+}
+
+# 目录版本配置：每次发布写入新的版本目录，旧版本保留一段时间后回收
+VERSION_CONFIG = {
+    'retention_days': 14,  # 旧版本目录至少保留的天数
+    'keep_versions': 2,  # 无论多旧，最近的几个版本始终保留
+    'history_days': 90  # 往期目录（catalogue_pages）有效期结束后仍保留其图片的天数，之后连同历史记录一起回收
+}
+
+# 内容寻址图片存储配置
+BLOB_STORE_CONFIG = {
+    'root': '../public/catalogue_images/blobs',  # blob文件根目录（相对爬虫目录）
+    'url_prefix': '/catalogue_images/blobs'  # 写入数据库的访问路径前缀
+}
+
+# 浏览器会话配置
+BROWSER_CONFIG = {
+    'max_uses': 20,  # 同一个Chrome进程最多复用的次数，超过后回收重启
+    'max_idle': 2,  # 空闲时保留的常驻Chrome进程数（并发的商店各自独占一个）
+    'page_load_timeout': 60,  # 页面加载/脚本超时秒数，不超过商店剩余的截止时间
+    'driver_cache_days': 7,  # chromedriver路径缓存有效天数
+    'implicit_wait': 0,  # 隐式等待秒数，元素等待统一用显式超时
+    'page_ready_timeout': 10,  # 查找选择器前等待页面就绪(document.readyState)的最长秒数，每个页面只等一次
+    'selector_poll_interval': 0.1  # 页面就绪检查、显式要求等待的选择器的轮询间隔秒数
+}
+
+# HTTP客户端配置
+HTTP_CONFIG = {
+    'pool_connections': 10,  # 连接池缓存的域名数
+    'pool_maxsize': 10,  # 每个域名保持的最大连接数
+    'per_host_concurrency': 4,  # 同一域名同时进行的最大请求数
+    'latency_buckets_ms': [50, 100, 250, 500, 1000, 2500, 5000, 10000]  # 延迟直方图分桶上限
 }
 
 # 调度配置
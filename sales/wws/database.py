@@ -1,85 +1,780 @@
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
+from mysql.connector.errors import PoolError
 import base64
+import time
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
 from datetime import datetime, date
-from config import DB_CONFIG
+from config import DB_CONFIG, DB_POOL_CONFIG
+from blob_store import BlobStore
 import logging
 
+# 暂存表结构与正式表一致，新目录先整批写入这里再一次性换入
+STAGING_TABLE = 'catalogue_images_staging'
+
+# 每页派生图（缩略图/移动端/完整图，JPEG/WebP），按页面图片路径关联
+VARIANTS_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS catalogue_image_variants (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    image_path VARCHAR(255) NOT NULL,
+    variant VARCHAR(20) NOT NULL,
+    format VARCHAR(10) NOT NULL,
+    width INT NOT NULL,
+    height INT NOT NULL,
+    bytes INT NOT NULL,
+    variant_path VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uniq_image_variant (image_path, variant, format)
+)
+"""
+
+# 页面感知哈希索引，用于跨周、跨商店查找几乎相同的页面
+PAGE_HASHES_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS catalogue_page_hashes (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    image_path VARCHAR(255) NOT NULL,
+    dhash BIGINT UNSIGNED NOT NULL,
+    width INT NOT NULL,
+    height INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uniq_image_path (image_path),
+    KEY idx_size (width, height)
+)
+"""
+
+
+# 目录头：每次发布一行，历史版本保留；is_current 标记商店当前在线的一期，
+# is_complete 为0表示渐进发布中还有页面未上线，first_page_seconds 为首页可见耗时
+CATALOGUES_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS catalogues (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    store_name VARCHAR(50) NOT NULL,
+    region VARCHAR(20) NULL,
+    version VARCHAR(40) NOT NULL,
+    week_date DATE NOT NULL,
+    valid_from DATE NOT NULL,
+    valid_to DATE NOT NULL,
+    source_url VARCHAR(1024) NULL,
+    sha256 CHAR(64) NULL,
+    page_count INT NOT NULL,
+    is_complete TINYINT(1) NOT NULL DEFAULT 1,
+    first_page_seconds DECIMAL(8, 2) NULL,
+    is_current TINYINT(1) NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uniq_store_version (store_name, version),
+    KEY idx_store_current (store_name, is_current),
+    KEY idx_store_valid (store_name, valid_from, valid_to)
+)
+"""
+
+# 目录页：每个版本的全部页面，按 (商店, 版本, 页码) 直接定位
+CATALOGUE_PAGES_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS catalogue_pages (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    catalogue_id INT NOT NULL,
+    store_name VARCHAR(50) NOT NULL,
+    version VARCHAR(40) NOT NULL,
+    page_number INT NOT NULL,
+    image_path VARCHAR(255) NOT NULL,
+    UNIQUE KEY uniq_store_version_page (store_name, version, page_number),
+    KEY idx_catalogue_page (catalogue_id, page_number),
+    KEY idx_image_path (image_path)
+)
+"""
+
+# catalogue_images（服务端读取的当前目录）上补充的索引: 索引名 -> 列
+CATALOGUE_IMAGES_INDEXES = {
+    'idx_store_page': '(store_name, page_number)',
+    'idx_image_data': '(image_data(191))'
+}
+
+# 后来新增的 catalogues 列，已存在的表在启动时补上: 列名 -> 定义
+CATALOGUES_ADDED_COLUMNS = {
+    'is_complete': 'TINYINT(1) NOT NULL DEFAULT 1',
+    'first_page_seconds': 'DECIMAL(8, 2) NULL'
+}
+
+# 目录头: 商店、地区、版本号、抓取日期、有效期起止、PDF地址、PDF内容哈希、是否全部页已上线、首页可见耗时、
+# PDF总页数（渐进发布时已上线的页数见 catalogue_pages / catalogue_images 行数；为None时取本次写入的页数）
+CatalogueHeader = namedtuple(
+    'CatalogueHeader',
+    ['store_name', 'region', 'version', 'week_date', 'valid_from', 'valid_to', 'source_url', 'sha256',
+     'is_complete', 'first_page_seconds', 'page_count'],
+    defaults=[True, None, None]
+)
+
+# 发布前在线目录的快照: catalogue_images 行 [(页码, image_data, week_date, version)]、当时的当前目录头id（没有时为None）
+CatalogueSnapshot = namedtuple('CatalogueSnapshot', ['rows', 'catalogue_id'])
+
+CATALOGUE_COLUMNS = [
+    'id', 'store_name', 'region', 'version', 'week_date', 'valid_from', 'valid_to', 'source_url', 'sha256',
+    'is_complete', 'first_page_seconds', 'page_count', 'is_current', 'created_at'
+]
+
+
+def _table_exists(cursor, table):
+    cursor.execute(
+        "SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def _column_exists(cursor, table, column):
+    cursor.execute(
+        """
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """,
+        (table, column)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def _index_exists(cursor, table, index):
+    cursor.execute(
+        """
+        SELECT COUNT(*) FROM INFORMATION_SCHEMA.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """,
+        (table, index)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def ensure_schema(cursor):
+    """建表、补列、补索引，可重复执行（每步先检查是否已存在）
+
+    catalogue_images 由服务端创建；还不存在时跳过它的列和索引，下次启动再补
+    """
+    for ddl in (VARIANTS_TABLE_DDL, PAGE_HASHES_TABLE_DDL, CATALOGUES_TABLE_DDL, CATALOGUE_PAGES_TABLE_DDL):
+        cursor.execute(ddl)
+    for column, definition in CATALOGUES_ADDED_COLUMNS.items():
+        if not _column_exists(cursor, 'catalogues', column):
+            cursor.execute(f"ALTER TABLE catalogues ADD COLUMN {column} {definition}")
+    if not _table_exists(cursor, 'catalogue_images'):
+        logging.warning("catalogue_images 表不存在，跳过其版本列和索引")
+        return
+    if not _column_exists(cursor, 'catalogue_images', 'version'):
+        cursor.execute("ALTER TABLE catalogue_images ADD COLUMN version VARCHAR(40) NULL")
+    for index, columns in CATALOGUE_IMAGES_INDEXES.items():
+        if not _index_exists(cursor, 'catalogue_images', index):
+            cursor.execute(f"ALTER TABLE catalogue_images ADD INDEX {index} {columns}")
+            logging.info(f"catalogue_images 已添加索引 {index}")
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {STAGING_TABLE} LIKE catalogue_images")
+    if not _column_exists(cursor, STAGING_TABLE, 'version'):
+        cursor.execute(f"ALTER TABLE {STAGING_TABLE} ADD COLUMN version VARCHAR(40) NULL")
+
+
+def record_catalogue(cursor, header, image_paths):
+    """在调用方的事务内写入目录头和已发布的页面，并把它标记为该商店的当前目录；page_count 为整本PDF页数"""
+    cursor.execute(
+        "UPDATE catalogues SET is_current = 0 WHERE store_name = %s AND is_current = 1",
+        (header.store_name,)
+    )
+    cursor.execute(
+        """
+        INSERT INTO catalogues
+            (store_name, region, version, week_date, valid_from, valid_to, source_url, sha256,
+             is_complete, first_page_seconds, page_count, is_current)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, 1)
+        ON DUPLICATE KEY UPDATE
+            region = VALUES(region), week_date = VALUES(week_date), valid_from = VALUES(valid_from),
+            valid_to = VALUES(valid_to), source_url = VALUES(source_url), sha256 = VALUES(sha256),
+            is_complete = VALUES(is_complete), first_page_seconds = VALUES(first_page_seconds),
+            page_count = VALUES(page_count), is_current = 1, id = LAST_INSERT_ID(id)
+        """,
+        tuple(header._replace(page_count=header.page_count or len(image_paths)))
+    )
+    catalogue_id = cursor.lastrowid
+    cursor.execute(
+        "DELETE FROM catalogue_pages WHERE store_name = %s AND version = %s",
+        (header.store_name, header.version)
+    )
+    cursor.executemany(
+        """
+        INSERT INTO catalogue_pages (catalogue_id, store_name, version, page_number, image_path)
+        VALUES (%s, %s, %s, %s, %s)
+        """,
+        [(catalogue_id, header.store_name, header.version, page_number, image_path)
+         for page_number, image_path in image_paths]
+    )
+    return catalogue_id
+
+
+def escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def replace_catalogue_images(connection, store_name, image_paths, week_date, header=None):
+    """批量写入一家商店的新目录并原子替换旧数据，返回被替换掉的旧 image_data 列表
+
+    1. executemany 把所有新页写入暂存表（不影响正式表）
+    2. 单个事务内：只删除新目录中不再存在的旧行 -> 只插入新增/变化的行 -> 清空暂存
+       页码和图片路径都没变的行原样保留（增量重建时未变化的页）；
+       有目录头时同一事务写入 catalogues / catalogue_pages 历史
+    事务提交前读者看到的始终是旧目录，不会出现空窗期。
+    """
+    version = header.version if header else None
+    rows = [(store_name, page_number, image_data, week_date) for page_number, image_data in image_paths]
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {STAGING_TABLE} WHERE store_name = %s", (store_name,))
+        cursor.executemany(
+            f"""
+            INSERT INTO {STAGING_TABLE} (store_name, page_number, image_data, week_date)
+            VALUES (%s, %s, %s, %s)
+            """,
+            rows
+        )
+        connection.commit()
+
+        connection.start_transaction()
+        cursor.execute(
+            "SELECT image_data FROM catalogue_images WHERE store_name = %s FOR UPDATE",
+            (store_name,)
+        )
+        old_paths = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            f"""
+            DELETE c FROM catalogue_images c
+            LEFT JOIN {STAGING_TABLE} s
+                ON s.store_name = c.store_name AND s.page_number = c.page_number AND s.image_data = c.image_data
+            WHERE c.store_name = %s AND s.store_name IS NULL
+            """,
+            (store_name,)
+        )
+        deleted = cursor.rowcount
+        cursor.execute(
+            f"""
+            INSERT INTO catalogue_images (store_name, page_number, image_data, week_date)
+            SELECT s.store_name, s.page_number, s.image_data, s.week_date
+            FROM {STAGING_TABLE} s
+            LEFT JOIN catalogue_images c
+                ON c.store_name = s.store_name AND c.page_number = s.page_number AND c.image_data = s.image_data
+            WHERE s.store_name = %s AND c.id IS NULL
+            ORDER BY s.page_number
+            """,
+            (store_name,)
+        )
+        inserted = cursor.rowcount
+        cursor.execute(
+            "UPDATE catalogue_images SET week_date = %s, version = %s WHERE store_name = %s",
+            (week_date, version, store_name)
+        )
+        cursor.execute(f"DELETE FROM {STAGING_TABLE} WHERE store_name = %s", (store_name,))
+        if header:
+            record_catalogue(cursor, header, image_paths)
+        connection.commit()
+        logging.info(
+            f"{store_name} 目录行: 保留 {len(rows) - inserted} 行，新增 {inserted} 行，删除 {deleted} 行"
+        )
+        return old_paths
+    except Error:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def decode_image_data(image_data):
+    """把 bytes / base64字符串 / data URI 统一转换为图片字节"""
+    if isinstance(image_data, bytes):
+        return image_data
+    if image_data.startswith('data:'):
+        image_data = image_data.split(',', 1)[1]
+    return base64.b64decode(image_data, validate=True)
+
+
+
 class DatabaseManager:
+    """基于连接池的数据访问层，整个进程共享一个实例（见 get_db_manager）"""
+    
     def __init__(self):
-        self.connection = None
+        self.pool = None
+        self.blob_store = BlobStore()
+        self._pool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.acquire_count = 0
+        self.acquire_total = 0.0
+        self.acquire_max = 0.0
+        self.reconnect_count = 0
         self.connect()
     
     def connect(self):
-        """连接数据库"""
+        """创建连接池"""
+        with self._pool_lock:
+            if self.pool:
+                return
+            try:
+                self.pool = pooling.MySQLConnectionPool(
+                    pool_name=DB_POOL_CONFIG['pool_name'],
+                    pool_size=DB_POOL_CONFIG['pool_size'],
+                    pool_reset_session=True,
+                    **DB_CONFIG
+                )
+                logging.info(f"数据库连接池创建成功，大小: {DB_POOL_CONFIG['pool_size']}")
+            except Error as e:
+                logging.error(f"数据库连接池创建失败: {e}")
+                self.pool = None
+                return
+        self.ensure_schema()
+    
+    def ensure_schema(self):
+        """连接池建立后统一建表/补索引，各查询不再各自执行DDL"""
         try:
-            self.connection = mysql.connector.connect(**DB_CONFIG)
-            if self.connection.is_connected():
-                logging.info("数据库连接成功")
+            with self.cursor() as cursor:
+                ensure_schema(cursor)
+            logging.info("数据库表结构检查完成")
+            return True
         except Error as e:
-            logging.error(f"数据库连接失败: {e}")
-            self.connection = None
+            logging.error(f"数据库表结构检查失败: {e}")
+            return False
     
     def disconnect(self):
-        """断开数据库连接"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            logging.info("数据库连接已断开")
+        """输出连接池统计（池中连接随进程退出关闭）"""
+        self.log_stats()
+    
+    def _checkout(self):
+        """从池中取连接，池满时等待到 acquire_timeout 为止"""
+        if not self.pool:
+            self.connect()
+            if not self.pool:
+                raise Error(msg="数据库连接池不可用")
+        
+        deadline = time.monotonic() + DB_POOL_CONFIG['acquire_timeout']
+        while True:
+            try:
+                return self.pool.get_connection()
+            except PoolError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.05)
+    
+    def _health_check(self, connection):
+        """取出时确认连接可用，断开的连接自动重连"""
+        try:
+            connection.ping(reconnect=False)
+        except Error:
+            logging.warning("数据库连接已断开，正在重连...")
+            connection.reconnect(
+                attempts=DB_POOL_CONFIG['reconnect_attempts'],
+                delay=DB_POOL_CONFIG['reconnect_delay']
+            )
+            with self._stats_lock:
+                self.reconnect_count += 1
+    
+    @contextmanager
+    def get_connection(self):
+        """借出一个健康的连接，退出时归还连接池"""
+        started = time.perf_counter()
+        connection = self._checkout()
+        try:
+            if DB_POOL_CONFIG['health_check']:
+                self._health_check(connection)
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                self.acquire_count += 1
+                self.acquire_total += elapsed
+                self.acquire_max = max(self.acquire_max, elapsed)
+            yield connection
+        finally:
+            connection.close()
+    
+    @contextmanager
+    def cursor(self, commit=False):
+        """借出连接并打开游标；commit=True 时正常退出自动提交，异常时回滚"""
+        with self.get_connection() as connection:
+            cursor = connection.cursor()
+            try:
+                yield cursor
+                if commit:
+                    connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    def acquire_stats(self):
+        """连接获取延迟统计"""
+        with self._stats_lock:
+            count = self.acquire_count
+            return {
+                'count': count,
+                'avg_ms': self.acquire_total / count * 1000 if count else 0.0,
+                'max_ms': self.acquire_max * 1000,
+                'reconnects': self.reconnect_count
+            }
+    
+    def log_stats(self):
+        stats = self.acquire_stats()
+        logging.info(
+            f"数据库连接池: 借出 {stats['count']} 次, 平均获取 {stats['avg_ms']:.1f} ms, "
+            f"最长 {stats['max_ms']:.1f} ms, 重连 {stats['reconnects']} 次"
+        )
     
     def clear_old_images(self, store_name):
         """清除旧的目录图片"""
         try:
-            cursor = self.connection.cursor()
-            query = "DELETE FROM catalogue_images WHERE store_name = %s"
-            cursor.execute(query, (store_name,))
-            self.connection.commit()
-            deleted_count = cursor.rowcount
+            with self.cursor(commit=True) as cursor:
+                query = "DELETE FROM catalogue_images WHERE store_name = %s"
+                cursor.execute(query, (store_name,))
+                deleted_count = cursor.rowcount
             logging.info(f"删除了 {deleted_count} 张旧的 {store_name} 图片")
-            cursor.close()
             return True
         except Error as e:
             logging.error(f"清除旧图片失败: {e}")
             return False
     
     def save_image(self, store_name, page_number, image_data, week_date):
-        """保存图片到数据库"""
+        """保存图片：内容写入blob存储，数据库只记录blob路径"""
         try:
-            cursor = self.connection.cursor()
-            
-            # 将图片转换为base64
-            if isinstance(image_data, bytes):
-                base64_data = base64.b64encode(image_data).decode('utf-8')
-            else:
-                base64_data = image_data
-            
-            # 完整的base64数据URI
-            full_base64 = f"data:image/jpeg;base64,{base64_data}"
+            image_bytes = decode_image_data(image_data)
+            key, created = self.blob_store.put(image_bytes)
+            blob_url = self.blob_store.url_for(key)
             
             query = """
             INSERT INTO catalogue_images (store_name, page_number, image_data, week_date)
             VALUES (%s, %s, %s, %s)
             """
             
-            cursor.execute(query, (store_name, page_number, full_base64, week_date))
-            self.connection.commit()
+            with self.cursor(commit=True) as cursor:
+                cursor.execute(query, (store_name, page_number, blob_url, week_date))
             
-            logging.info(f"保存图片成功: {store_name} 第{page_number}页")
-            cursor.close()
+            state = "新写入" if created else "复用已有"
+            logging.info(f"保存图片成功: {store_name} 第{page_number}页 -> {blob_url} ({state})")
             return True
             
-        except Error as e:
+        except (Error, OSError, ValueError) as e:
             logging.error(f"保存图片失败: {e}")
             return False
     
+    def replace_catalogue(self, store_name, image_paths, week_date, header=None):
+        """批量替换商店目录，失败时正式数据保持不变；成功返回旧 image_data 列表
+
+        header 为 CatalogueHeader 时同时记录目录头和页面历史
+        """
+        try:
+            with self.get_connection() as connection:
+                old_paths = replace_catalogue_images(connection, store_name, image_paths, week_date, header)
+            logging.info(f"{store_name} 目录已替换: {len(old_paths)} 条旧记录 -> {len(image_paths)} 条新记录")
+            return old_paths
+        except Error as e:
+            logging.error(f"替换 {store_name} 目录失败: {e}")
+            return None
+    
+    def snapshot_catalogue(self, store_name):
+        """取商店当前在线的全部目录行和当前目录头，渐进发布中断时用 restore_catalogue 恢复；查询失败返回None
+
+        不依赖 catalogues 目录头：升级前的旧目录行、手动上传的目录都能恢复
+        """
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT page_number, image_data, week_date, version FROM catalogue_images
+                    WHERE store_name = %s ORDER BY page_number
+                    """,
+                    (store_name,)
+                )
+                rows = cursor.fetchall()
+                cursor.execute(
+                    "SELECT id FROM catalogues WHERE store_name = %s AND is_current = 1 LIMIT 1",
+                    (store_name,)
+                )
+                current = cursor.fetchone()
+            return CatalogueSnapshot(rows, current[0] if current else None)
+        except Error as e:
+            logging.error(f"读取 {store_name} 在线目录快照失败: {e}")
+            return None
+    
+    def restore_catalogue(self, store_name, snapshot):
+        """单个事务内把商店目录行恢复为快照，并恢复目录头的 is_current（快照时没有当前目录头则都不标记）"""
+        try:
+            with self.get_connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    connection.start_transaction()
+                    cursor.execute("DELETE FROM catalogue_images WHERE store_name = %s", (store_name,))
+                    cursor.executemany(
+                        """
+                        INSERT INTO catalogue_images (store_name, page_number, image_data, week_date, version)
+                        VALUES (%s, %s, %s, %s, %s)
+                        """,
+                        [(store_name, *row) for row in snapshot.rows]
+                    )
+                    cursor.execute(
+                        "UPDATE catalogues SET is_current = 0 WHERE store_name = %s AND is_current = 1",
+                        (store_name,)
+                    )
+                    if snapshot.catalogue_id:
+                        cursor.execute("UPDATE catalogues SET is_current = 1 WHERE id = %s", (snapshot.catalogue_id,))
+                    connection.commit()
+                except Error:
+                    connection.rollback()
+                    raise
+                finally:
+                    cursor.close()
+            logging.info(f"{store_name} 目录已恢复为发布前的 {len(snapshot.rows)} 条记录")
+            return True
+        except Error as e:
+            logging.error(f"恢复 {store_name} 目录失败: {e}")
+            return False
+    
+    def save_variants(self, variants):
+        """写入派生图记录，同一页同一规格重复生成时覆盖"""
+        if not variants:
+            return True
+        rows = [
+            (v.image_path, v.name, v.format, v.width, v.height, v.size, v.db_path)
+            for v in variants
+        ]
+        try:
+            with self.cursor(commit=True) as cursor:
+                cursor.executemany(
+                    """
+                    INSERT INTO catalogue_image_variants
+                        (image_path, variant, format, width, height, bytes, variant_path)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE
+                        width = VALUES(width), height = VALUES(height),
+                        bytes = VALUES(bytes), variant_path = VALUES(variant_path)
+                    """,
+                    rows
+                )
+            logging.info(f"保存 {len(rows)} 条派生图记录")
+            return True
+        except Error as e:
+            logging.error(f"保存派生图记录失败: {e}")
+            return False
+    
+    def delete_variants(self, image_paths):
+        """删除指定页面图片的派生图记录"""
+        if not image_paths:
+            return 0
+        placeholders = ', '.join(['%s'] * len(image_paths))
+        try:
+            with self.cursor(commit=True) as cursor:
+                cursor.execute(
+                    f"DELETE FROM catalogue_image_variants WHERE image_path IN ({placeholders})",
+                    list(image_paths)
+                )
+                return cursor.rowcount
+        except Error as e:
+            logging.error(f"删除派生图记录失败: {e}")
+            return 0
+    
+    def find_similar_pages(self, page_hash, max_distance):
+        """查找尺寸相同、dHash汉明距离不超过 max_distance 的已有页面，按距离从近到远返回路径"""
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT image_path, BIT_COUNT(dhash ^ %s) AS distance
+                    FROM catalogue_page_hashes
+                    WHERE width = %s AND height = %s
+                    HAVING distance <= %s
+                    ORDER BY distance, id
+                    LIMIT 10
+                    """,
+                    (page_hash.dhash, page_hash.width, page_hash.height, max_distance)
+                )
+                return [row[0] for row in cursor.fetchall()]
+        except Error as e:
+            logging.error(f"查询相似页面失败: {e}")
+            return []
+    
+    def save_page_hashes(self, page_hashes):
+        """写入新页面的感知哈希"""
+        if not page_hashes:
+            return True
+        try:
+            with self.cursor(commit=True) as cursor:
+                cursor.executemany(
+                    """
+                    INSERT INTO catalogue_page_hashes (image_path, dhash, width, height)
+                    VALUES (%s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE dhash = VALUES(dhash), width = VALUES(width), height = VALUES(height)
+                    """,
+                    [(h.image_path, h.dhash, h.width, h.height) for h in page_hashes]
+                )
+            return True
+        except Error as e:
+            logging.error(f"保存页面哈希失败: {e}")
+            return False
+    
+    def delete_page_hashes(self, image_paths):
+        """图片文件删除后同时移除其哈希，避免后续页面引用不存在的文件"""
+        if not image_paths:
+            return 0
+        placeholders = ', '.join(['%s'] * len(image_paths))
+        try:
+            with self.cursor(commit=True) as cursor:
+                cursor.execute(
+                    f"DELETE FROM catalogue_page_hashes WHERE image_path IN ({placeholders})",
+                    list(image_paths)
+                )
+                return cursor.rowcount
+        except Error as e:
+            logging.error(f"删除页面哈希失败: {e}")
+            return 0
+    
+    def referenced_image_paths(self, image_paths):
+        """返回其中仍被任意商店目录行引用的路径（去重后同一文件可能被多家商店共用）"""
+        if not image_paths:
+            return set()
+        placeholders = ', '.join(['%s'] * len(image_paths))
+        with self.cursor() as cursor:
+            cursor.execute(
+                f"SELECT DISTINCT image_data FROM catalogue_images WHERE image_data IN ({placeholders})",
+                list(image_paths)
+            )
+            return {row[0] for row in cursor.fetchall()}
+    
+    def count_image_references(self, prefix):
+        """以 prefix 开头的图片路径被多少目录行引用"""
+        with self.cursor() as cursor:
+            cursor.execute(
+                "SELECT COUNT(*) FROM catalogue_images WHERE image_data LIKE %s",
+                (escape_like(prefix) + '%',)
+            )
+            return cursor.fetchone()[0]
+    
+    def count_history_references(self, prefix, since):
+        """以 prefix 开头的图片路径被多少条历史目录页引用（只算有效期在 since 之后结束的目录）"""
+        with self.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT COUNT(*) FROM catalogue_pages p
+                JOIN catalogues c ON c.id = p.catalogue_id
+                WHERE p.image_path LIKE %s AND c.valid_to >= %s
+                """,
+                (escape_like(prefix) + '%', since)
+            )
+            return cursor.fetchone()[0]
+    
+    def prune_history(self, prefix):
+        """版本目录回收后，删除引用其中图片的历史目录（目录头和全部页面，当前目录不动），返回删除的期数"""
+        try:
+            with self.cursor(commit=True) as cursor:
+                cursor.execute(
+                    """
+                    SELECT DISTINCT c.id FROM catalogues c
+                    JOIN catalogue_pages p ON p.catalogue_id = c.id
+                    WHERE p.image_path LIKE %s AND c.is_current = 0
+                    """,
+                    (escape_like(prefix) + '%',)
+                )
+                ids = [row[0] for row in cursor.fetchall()]
+                if ids:
+                    placeholders = ', '.join(['%s'] * len(ids))
+                    cursor.execute(f"DELETE FROM catalogue_pages WHERE catalogue_id IN ({placeholders})", ids)
+                    cursor.execute(f"DELETE FROM catalogues WHERE id IN ({placeholders})", ids)
+            return len(ids)
+        except Error as e:
+            logging.error(f"清理引用 {prefix} 的历史目录失败: {e}")
+            return 0
+    
+    def purge_image_prefix(self, prefix):
+        """版本目录回收后，删除其中图片的派生图和感知哈希记录"""
+        pattern = escape_like(prefix) + '%'
+        try:
+            with self.cursor(commit=True) as cursor:
+                cursor.execute("DELETE FROM catalogue_image_variants WHERE image_path LIKE %s", (pattern,))
+                cursor.execute("DELETE FROM catalogue_page_hashes WHERE image_path LIKE %s", (pattern,))
+            return True
+        except Error as e:
+            logging.error(f"清理 {prefix} 的派生记录失败: {e}")
+            return False
+    
+    def _fetch_catalogue(self, cursor, where, params):
+        """按条件取一期目录头及其页面 [(页码, 图片路径)]，没有则返回None"""
+        cursor.execute(
+            f"SELECT {', '.join(CATALOGUE_COLUMNS)} FROM catalogues WHERE {where} "
+            "ORDER BY valid_from DESC, id DESC LIMIT 1",
+            params
+        )
+        row = cursor.fetchone()
+        if not row:
+            return None
+        catalogue = dict(zip(CATALOGUE_COLUMNS, row))
+        cursor.execute(
+            """
+            SELECT page_number, image_path FROM catalogue_pages
+            WHERE store_name = %s AND version = %s
+            ORDER BY page_number
+            """,
+            (catalogue['store_name'], catalogue['version'])
+        )
+        catalogue['pages'] = cursor.fetchall()
+        return catalogue
+    
+    def get_current_catalogue(self, store_name):
+        """商店当前在线的一期目录（走 idx_store_current 索引）"""
+        try:
+            with self.cursor() as cursor:
+                return self._fetch_catalogue(cursor, "store_name = %s AND is_current = 1", (store_name,))
+        except Error as e:
+            logging.error(f"查询 {store_name} 当前目录失败: {e}")
+            return None
+    
+    def get_catalogue_for_week(self, store_name, day):
+        """day 当天有效的一期目录（走 idx_store_valid 索引），历史周同样可查"""
+        try:
+            with self.cursor() as cursor:
+                return self._fetch_catalogue(
+                    cursor, "store_name = %s AND valid_from <= %s AND valid_to >= %s", (store_name, day, day)
+                )
+        except Error as e:
+            logging.error(f"查询 {store_name} {day} 的目录失败: {e}")
+            return None
+    
+    def list_catalogues(self, store_name, limit=20):
+        """商店的历史目录头，最新的在前"""
+        try:
+            with self.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT {', '.join(CATALOGUE_COLUMNS)} FROM catalogues
+                    WHERE store_name = %s
+                    ORDER BY valid_from DESC, id DESC
+                    LIMIT %s
+                    """,
+                    (store_name, limit)
+                )
+                return [dict(zip(CATALOGUE_COLUMNS, row)) for row in cursor.fetchall()]
+        except Error as e:
+            logging.error(f"查询 {store_name} 历史目录失败: {e}")
+            return []
+    
+    def delete_catalogue(self, store_name, version):
+        """删除未发布成功的版本的目录头和页面（当前在线的目录不删）"""
+        try:
+            with self.cursor(commit=True) as cursor:
+                cursor.execute(
+                    "DELETE FROM catalogues WHERE store_name = %s AND version = %s AND is_current = 0",
+                    (store_name, version)
+                )
+                if cursor.rowcount:
+                    cursor.execute(
+                        "DELETE FROM catalogue_pages WHERE store_name = %s AND version = %s",
+                        (store_name, version)
+                    )
+            return True
+        except Error as e:
+            logging.error(f"删除 {store_name} 版本 {version} 的目录记录失败: {e}")
+            return False
+    
     def get_images_count(self, store_name):
         """获取指定商店的图片数量"""
         try:
-            cursor = self.connection.cursor()
-            query = "SELECT COUNT(*) FROM catalogue_images WHERE store_name = %s"
-            cursor.execute(query, (store_name,))
-            count = cursor.fetchone()[0]
-            cursor.close()
-            return count
+            with self.cursor() as cursor:
+                query = "SELECT COUNT(*) FROM catalogue_images WHERE store_name = %s"
+                cursor.execute(query, (store_name,))
+                return cursor.fetchone()[0]
         except Error as e:
             logging.error(f"获取图片数量失败: {e}")
             return 0
@@ -87,13 +782,23 @@ class DatabaseManager:
     def test_connection(self):
         """测试数据库连接"""
         try:
-            if self.connection and self.connection.is_connected():
-                cursor = self.connection.cursor()
+            with self.cursor() as cursor:
                 cursor.execute("SELECT 1")
                 result = cursor.fetchone()
-                cursor.close()
-                return result[0] == 1
-            return False
+            return result[0] == 1
         except Error as e:
             logging.error(f"数据库连接测试失败: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_db_manager():
+    """获取进程内共享的数据库管理器"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = DatabaseManager()
+        return _manager
@@ -5,18 +5,16 @@
 
 import os
 import logging
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
+from browser_session import get_browser_session
+from dom_extract import find_pdf_links
 
 class DebugScraper:
     def __init__(self):
         self.setup_logging()
-        self.driver = None
+        self.browser = None
     
     def setup_logging(self):
         logging.basicConfig(
@@ -26,40 +24,31 @@ class DebugScraper:
     
     def setup_driver(self):
         try:
-            chrome_options = Options()
-            # 注释掉headless，这样可以看到浏览器
-            # chrome_options.add_argument('--headless')  
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.driver.implicitly_wait(10)
-            
-            logging.info("Chrome浏览器启动成功")
+            # 非无头模式，这样可以看到浏览器；驱动路径使用本地缓存。浏览器由 tab() 按需启动并在用完后放回池中复用
+            self.browser = get_browser_session(headless=False)
             return True
             
         except Exception as e:
             logging.error(f"浏览器启动失败: {e}")
             return False
     
-    def debug_coles(self):
+    def debug_coles(self, driver):
         """调试Coles网站"""
         try:
             logging.info("=== 调试Coles网站 ===")
-            self.driver.get("https://www.coles.com.au/catalogues")
+            driver.get("https://www.coles.com.au/catalogues")
             
             # 等待页面加载
-            WebDriverWait(self.driver, 20).until(
+            WebDriverWait(driver, 20).until(
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
             )
             
             # 保存页面截图
-            self.driver.save_screenshot("coles_page.png")
+            driver.save_screenshot("coles_page.png")
             logging.info("Coles页面截图已保存: coles_page.png")
             
             # 查找所有包含"catalogue"的文本
-            elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), 'catalogue') or contains(text(), 'Catalogue')]")
+            elements = driver.find_elements(By.XPATH, "//*[contains(text(), 'catalogue') or contains(text(), 'Catalogue')]")
             logging.info(f"找到 {len(elements)} 个包含'catalogue'的元素")
             
             for i, element in enumerate(elements[:10]):  # 只显示前10个
@@ -70,13 +59,8 @@ class DebugScraper:
                 except:
                     pass
             
-            # 查找所有PDF链接
-            all_links = self.driver.find_elements(By.TAG_NAME, "a")
-            pdf_links = []
-            for link in all_links:
-                href = link.get_attribute('href')
-                if href and '.pdf' in href.lower():
-                    pdf_links.append(href)
+            # 查找所有PDF链接（一次脚本调用取回）
+            pdf_links = [link.url for link in find_pdf_links(driver)]
             
             logging.info(f"找到 {len(pdf_links)} 个PDF链接:")
             for i, pdf_link in enumerate(pdf_links):
@@ -88,23 +72,23 @@ class DebugScraper:
             logging.error(f"调试Coles失败: {e}")
             return []
     
-    def debug_woolworths(self):
+    def debug_woolworths(self, driver):
         """调试Woolworths网站"""
         try:
             logging.info("=== 调试Woolworths网站 ===")
-            self.driver.get("https://www.woolworths.com.au/shop/catalogue")
+            driver.get("https://www.woolworths.com.au/shop/catalogue")
             
             # 等待页面加载
-            WebDriverWait(self.driver, 20).until(
+            WebDriverWait(driver, 20).until(
                 EC.presence_of_element_located((By.TAG_NAME, "body"))
             )
             
             # 保存页面截图
-            self.driver.save_screenshot("woolworths_page.png")
+            driver.save_screenshot("woolworths_page.png")
             logging.info("Woolworths页面截图已保存: woolworths_page.png")
             
             # 查找所有包含"catalogue"的文本
-            elements = self.driver.find_elements(By.XPATH, "//*[contains(text(), 'catalogue') or contains(text(), 'Catalogue')]")
+            elements = driver.find_elements(By.XPATH, "//*[contains(text(), 'catalogue') or contains(text(), 'Catalogue')]")
             logging.info(f"找到 {len(elements)} 个包含'catalogue'的元素")
             
             for i, element in enumerate(elements[:10]):
@@ -115,13 +99,8 @@ class DebugScraper:
                 except:
                     pass
             
-            # 查找所有PDF链接
-            all_links = self.driver.find_elements(By.TAG_NAME, "a")
-            pdf_links = []
-            for link in all_links:
-                href = link.get_attribute('href')
-                if href and '.pdf' in href.lower():
-                    pdf_links.append(href)
+            # 查找所有PDF链接（一次脚本调用取回）
+            pdf_links = [link.url for link in find_pdf_links(driver)]
             
             logging.info(f"找到 {len(pdf_links)} 个PDF链接:")
             for i, pdf_link in enumerate(pdf_links):
@@ -139,19 +118,18 @@ class DebugScraper:
             return
         
         try:
-            # 调试Coles
-            coles_pdfs = self.debug_coles()
-            
-            input("按Enter继续调试Woolworths...")  # 暂停，让你看看结果
+            # 调试Coles（每家商店一个标签页，浏览器崩溃时 tab() 会重新启动）
+            with self.browser.tab('coles') as driver:
+                coles_pdfs = self.debug_coles(driver)
+                input("按Enter继续调试Woolworths...")  # 暂停，让你看看结果
             
             # 调试Woolworths  
-            woolworths_pdfs = self.debug_woolworths()
-            
-            input("按Enter关闭浏览器...")
+            with self.browser.tab('woolworths') as driver:
+                woolworths_pdfs = self.debug_woolworths(driver)
+                input("按Enter关闭浏览器...")
             
         finally:
-            if self.driver:
-                self.driver.quit()
+            self.browser.shutdown()
 
 if __name__ == "__main__":
     scraper = DebugScraper()
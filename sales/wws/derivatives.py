@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+多尺寸派生图 - 每页生成缩略图、移动端宽度图和限制尺寸的完整图（JPEG，可选WebP），
+全部记录到 catalogue_image_variants 表，客户端按显示尺寸取最小的合适版本；
+尺寸与原图相同的规格不再重新编码，直接记录为原图。JPEG派生图与原图一样走预算编码（jpeg_encoder），
+质量不超过原图（按量化表估计），不会以固定 image_quality 重新编码已压缩过的原图，把省下的字节又花在派生图上
+"""
+
+import os
+import time
+import logging
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+from jpeg_encoder import encode_page, estimate_quality
+from config import SCRAPER_CONFIG, DERIVATIVE_CONFIG, ENCODER_CONFIG
+
+# 派生图: 所属页面图片路径、规格名、格式、宽、高、字节数、本地路径、数据库路径
+Variant = namedtuple('Variant', ['image_path', 'name', 'format', 'width', 'height', 'size', 'file_path', 'db_path'])
+
+FORMAT_EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+
+
+def fit_size(size, spec):
+    """按规格计算目标尺寸：width 限宽，max_size 为包围盒（随页面横竖方向调换），只缩小不放大"""
+    width, height = size
+    if 'width' in spec:
+        scale = spec['width'] / width
+    else:
+        box_w, box_h = spec['max_size']
+        if height > width:
+            box_w, box_h = min(box_w, box_h), max(box_w, box_h)
+        scale = min(box_w / width, box_h / height)
+    scale = min(scale, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def output_formats():
+    formats = ['JPEG']
+    if DERIVATIVE_CONFIG['webp']:
+        formats.append('WEBP')
+    return formats
+
+
+def variant_filename(base_name, variant_name, image_format):
+    """如 20250605_page3_thumb.webp"""
+    return f"{base_name}_{variant_name}.{FORMAT_EXTENSIONS[image_format]}"
+
+
+def variant_files(source_path):
+    """一页所有派生图文件的本地路径，用于判断是否已生成和清理；与原图同尺寸的规格直接引用原图，没有文件"""
+    base_name = os.path.splitext(os.path.basename(source_path))[0]
+    output_dir = os.path.dirname(source_path)
+    try:
+        with Image.open(source_path) as source:
+            size = source.size
+    except OSError:
+        size = None  # 原图已不存在（清理时），列出所有可能的文件名
+    return [
+        os.path.join(output_dir, variant_filename(base_name, spec['name'], image_format))
+        for spec in DERIVATIVE_CONFIG['variants']
+        if size is None or fit_size(size, spec) != size
+        for image_format in output_formats()
+    ]
+
+
+def _save_variant(image, file_path, image_format, source_quality=None):
+    """source_quality 为原图JPEG质量（未知时为None），派生图质量不超过它"""
+    def capped(quality):
+        return min(quality, source_quality) if source_quality else quality
+
+    if image_format == 'WEBP':
+        image.save(file_path, 'WEBP', quality=capped(DERIVATIVE_CONFIG['webp_quality']), method=4)
+    elif ENCODER_CONFIG['enabled']:
+        with open(file_path, 'wb') as f:
+            f.write(encode_page(image, measure_baseline=False, max_quality=source_quality).data)
+    else:
+        image.save(
+            file_path,
+            'JPEG',
+            quality=capped(SCRAPER_CONFIG['image_quality']),
+            optimize=True,
+            progressive=DERIVATIVE_CONFIG['progressive']
+        )
+
+
+def generate_page_variants(source_path, image_path):
+    """为一页生成所有规格和格式的派生图，返回 Variant 列表"""
+    base_name = os.path.splitext(os.path.basename(source_path))[0]
+    output_dir = os.path.dirname(source_path)
+    url_dir = image_path.rsplit('/', 1)[0]
+    variants = []
+
+    with Image.open(source_path) as source:
+        source_format = source.format
+        source_quality = estimate_quality(source)
+        source = source.convert('RGB')
+        for spec in DERIVATIVE_CONFIG['variants']:
+            target_size = fit_size(source.size, spec)
+            if target_size == source.size:
+                # 原图已经是这个尺寸（按 max_image_size 渲染的完整图），再编码一次只会多一次有损压缩
+                variants.append(Variant(
+                    image_path, spec['name'], source_format.lower(), target_size[0], target_size[1],
+                    os.path.getsize(source_path), source_path, image_path
+                ))
+                continue
+            resized = source.resize(target_size, Image.LANCZOS)
+            for image_format in output_formats():
+                filename = variant_filename(base_name, spec['name'], image_format)
+                file_path = os.path.join(output_dir, filename)
+                _save_variant(resized, file_path, image_format, source_quality)
+                variants.append(Variant(
+                    image_path, spec['name'], image_format.lower(), target_size[0], target_size[1],
+                    os.path.getsize(file_path), file_path, f"{url_dir}/{filename}"
+                ))
+            resized.close()
+    return variants
+
+
+def generate_variants(pages, label=''):
+    """pages: [(本地原图路径, 数据库路径)]，按 render_workers 并行生成，返回全部 Variant"""
+    if not pages:
+        return []
+
+    started = time.perf_counter()
+    workers = SCRAPER_CONFIG['render_workers']
+    if workers > 1 and len(pages) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pages))) as executor:
+            futures = [executor.submit(generate_page_variants, source_path, image_path) for source_path, image_path in pages]
+            results = [future.result() for future in futures]
+    else:
+        results = [generate_page_variants(source_path, image_path) for source_path, image_path in pages]
+
+    variants = [variant for page_variants in results for variant in page_variants]
+    log_variant_sizes(pages, variants, label, time.perf_counter() - started)
+    return variants
+
+
+def log_variant_sizes(pages, variants, label, elapsed):
+    """输出每种规格的平均大小，与原图对比"""
+    source_bytes = sum(os.path.getsize(source_path) for source_path, _ in pages) / len(pages)
+    totals = {}
+    for variant in variants:
+        key = f"{variant.name}.{variant.format}"
+        count, size = totals.get(key, (0, 0))
+        totals[key] = (count + 1, size + variant.size)
+    summary = ', '.join(
+        f"{key} {size / count / 1024:.0f} KB({source_bytes / (size / count):.1f}x)"
+        for key, (count, size) in totals.items()
+    )
+    logging.info(
+        f"{label}派生图生成完成: {len(pages)} 页，{len(variants)} 个文件，耗时 {elapsed:.2f} s；"
+        f"原图平均 {source_bytes / 1024:.0f} KB，{summary}"
+    )
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+单次DOM提取 - 一次 execute_script 取回页面上所有链接及其文字和祖先容器文字，
+排序筛选在Python中完成，避免逐个元素 get_attribute 的WebDriver往返
+"""
+
+import time
+import logging
+from collections import namedtuple
+from catalogue_discovery import PdfLink, CONTEXT_LEVELS, CONTEXT_LIMIT, rank_pdf_links
+
+# 页面链接: 绝对地址、链接文字、由近到远的祖先容器文字（只对可能与PDF相关的链接收集）
+PageAnchor = namedtuple('PageAnchor', ['href', 'text', 'context'])
+
+EXTRACT_ANCHORS_JS = """
+const levels = arguments[0], limit = arguments[1];
+const clean = (s) => (s || '').replace(/\\s+/g, ' ').trim();
+const result = [];
+for (const a of document.querySelectorAll('a[href]')) {
+    const href = a.href;
+    const text = clean(a.textContent);
+    const context = [];
+    if (/pdf/i.test(href) || /pdf/i.test(text)) {
+        let parent = a.parentElement;
+        for (let i = 0; i < levels && parent && parent !== document.body; i++) {
+            const parentText = clean(parent.textContent);
+            if (parentText.length > limit) break;
+            context.push(parentText);
+            parent = parent.parentElement;
+        }
+    }
+    result.push([href, text, context]);
+}
+return result;
+"""
+
+
+def extract_anchors(driver):
+    """一次脚本调用取回所有链接"""
+    started = time.perf_counter()
+    rows = driver.execute_script(EXTRACT_ANCHORS_JS, CONTEXT_LEVELS, CONTEXT_LIMIT) or []
+    anchors = [PageAnchor(href, text, tuple(context)) for href, text, context in rows]
+    logging.info(f"DOM提取 {len(anchors)} 个链接，耗时 {(time.perf_counter() - started) * 1000:.0f} ms")
+    return anchors
+
+
+def pdf_links_from_anchors(anchors):
+    """筛出PDF链接，按文档顺序去重"""
+    links = []
+    seen = set()
+    for anchor in anchors:
+        if '.pdf' not in anchor.href.lower() or anchor.href in seen:
+            continue
+        seen.add(anchor.href)
+        links.append(PdfLink(anchor.href, anchor.text, anchor.context, 'anchor'))
+    return links
+
+
+def find_pdf_links(driver, preferred_text=None, anchors=None):
+    """返回当前页面上排序后的PDF链接（可传入已提取的 anchors 复用）"""
+    if anchors is None:
+        anchors = extract_anchors(driver)
+    return rank_pdf_links(pdf_links_from_anchors(anchors), preferred_text)
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+PDF下载缓存 - 按URL记录ETag/Last-Modified/内容哈希，支持条件请求和未变化跳过
+下载按块流式写入临时文件，连接中断后用HTTP Range续传，完成后校验长度
+"""
+
+import os
+import json
+import hashlib
+import logging
+import requests
+from collections import namedtuple
+from config import SCRAPER_CONFIG
+from http_client import get_http_client
+
+# 下载结果: 本地PDF路径、文件大小、内容哈希、是否来自缓存(304)、该内容是否已经发布过
+DownloadResult = namedtuple('DownloadResult', ['path', 'size', 'sha256', 'from_cache', 'already_published'])
+
+
+class IncompleteDownloadError(Exception):
+    """下载长度与服务器声明的不一致"""
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """分块计算文件SHA-256，不把整个文件读进内存"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def resolve_cache_dir(name):
+    """缓存目录统一放在爬虫目录下的 cache_dir 中"""
+    cache_root = SCRAPER_CONFIG['cache_dir']
+    if not os.path.isabs(cache_root):
+        cache_root = os.path.join(os.path.dirname(os.path.abspath(__file__)), cache_root)
+    path = os.path.join(cache_root, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class DownloadCache:
+    def __init__(self, cache_dir=None, http_client=None):
+        self.cache_dir = cache_dir or resolve_cache_dir('downloads')
+        self.http = http_client or get_http_client()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _meta_path(self, url):
+        return os.path.join(self.cache_dir, f"{self._key(url)}.json")
+
+    def body_path(self, url):
+        return os.path.join(self.cache_dir, f"{self._key(url)}.pdf")
+
+    def load(self, url):
+        """读取URL对应的缓存元数据，不存在返回None"""
+        try:
+            with open(self._meta_path(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_meta(self, url, meta):
+        """先写临时文件再替换，避免中途失败留下半截JSON"""
+        meta_path = self._meta_path(url)
+        temp_path = f"{meta_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, meta_path)
+
+    def conditional_headers(self, url):
+        """生成条件请求头，只有本地缓存文件存在时才发送"""
+        meta = self.load(url)
+        if not meta or not os.path.exists(self.body_path(url)):
+            return {}
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def part_path(self, url):
+        return f"{self.body_path(url)}.part"
+
+    def _commit(self, url, response_headers):
+        """下载完成：临时文件原子替换为正式缓存，并更新校验信息"""
+        part_path = self.part_path(url)
+        sha256 = file_sha256(part_path)
+        size = os.path.getsize(part_path)
+        os.replace(part_path, self.body_path(url))
+
+        meta = self.load(url) or {}
+        meta.pop('partial_validator', None)
+        meta.update({
+            'url': url,
+            'etag': response_headers.get('ETag'),
+            'last_modified': response_headers.get('Last-Modified'),
+            'sha256': sha256,
+            'size': size
+        })
+        self._save_meta(url, meta)
+        return sha256, size
+
+    def _cached_result(self, url):
+        meta = self.load(url)
+        logging.info(f"PDF未修改(304)，使用本地缓存: {self.body_path(url)}")
+        return DownloadResult(
+            self.body_path(url),
+            meta['size'],
+            meta['sha256'],
+            True,
+            self.is_published(url, meta['sha256'])
+        )
+
+    def is_published(self, url, sha256):
+        """该内容是否已经完整跑完渲染和入库"""
+        meta = self.load(url) or {}
+        return meta.get('published_sha256') == sha256
+
+    def mark_published(self, url, sha256):
+        """整条流水线成功后调用，下次遇到相同内容可直接跳过"""
+        meta = self.load(url) or {'url': url}
+        meta['published_sha256'] = sha256
+        self._save_meta(url, meta)
+
+    def fetch(self, url, headers=None, timeout=60):
+        """条件下载并流式写盘，连接中断时从断点续传，返回 DownloadResult"""
+        attempts = max(1, SCRAPER_CONFIG['download_resume_attempts'])
+        for attempt in range(1, attempts + 1):
+            try:
+                return self._fetch_once(url, headers, timeout)
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError, IncompleteDownloadError) as e:
+                part_path = self.part_path(url)
+                received = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                logging.warning(f"PDF下载中断(第{attempt}/{attempts}次): {e}，已下载 {received} bytes")
+                if attempt == attempts:
+                    raise
+
+    def _fetch_once(self, url, headers, timeout):
+        request_headers = dict(headers or {})
+        # 禁止压缩传输，保证Range偏移和Content-Length对应文件字节
+        request_headers['Accept-Encoding'] = 'identity'
+
+        meta = self.load(url) or {}
+        part_path = self.part_path(url)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if offset:
+            request_headers['Range'] = f"bytes={offset}-"
+            if meta.get('partial_validator'):
+                # 服务器上的文件已变化时 If-Range 会让它返回完整的200响应
+                request_headers['If-Range'] = meta['partial_validator']
+        else:
+            request_headers.update(self.conditional_headers(url))
+
+        chunk_size = SCRAPER_CONFIG['download_chunk_size']
+        with self.http.stream('GET', url, headers=request_headers, timeout=timeout) as response:
+            if response.status_code == 304:
+                return self._cached_result(url)
+
+            if response.status_code == 416:
+                # 断点已超出文件长度，丢弃临时文件重新下载
+                os.remove(part_path)
+                raise IncompleteDownloadError("续传位置无效，重新开始下载")
+
+            if response.status_code == 206:
+                mode = 'ab'
+                expected = int(response.headers.get('Content-Range', '*/0').rsplit('/', 1)[1] or 0) or None
+                logging.info(f"从 {offset} bytes 处续传PDF")
+            elif response.status_code == 200:
+                mode = 'wb'
+                content_length = response.headers.get('Content-Length')
+                expected = int(content_length) if content_length else None
+                meta['partial_validator'] = response.headers.get('ETag') or response.headers.get('Last-Modified')
+                self._save_meta(url, meta)
+            else:
+                logging.error(f"PDF下载失败: HTTP {response.status_code}")
+                return None
+
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        f.write(chunk)
+            response_headers = response.headers
+
+        received = os.path.getsize(part_path)
+        if expected is not None and received != expected:
+            raise IncompleteDownloadError(f"期望 {expected} bytes，实际 {received} bytes")
+
+        sha256, size = self._commit(url, response_headers)
+        return DownloadResult(self.body_path(url), size, sha256, False, self.is_published(url, sha256))
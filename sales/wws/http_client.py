@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+共享HTTP客户端 - 连接池复用、指数退避重试、按域名限制并发，并统计请求指标
+"""
+
+import time
+import random
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from config import COLES_CONFIG, SCRAPER_CONFIG, HTTP_CONFIG
+
+# 服务器临时性错误，值得重试
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class HttpStats:
+    """请求次数、字节数和延迟直方图（线程安全）"""
+
+    def __init__(self, buckets_ms=None):
+        self.buckets_ms = list(buckets_ms or HTTP_CONFIG['latency_buckets_ms'])
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.retries = 0
+            self.errors = 0
+            self.bytes = 0
+            self.status_counts = {}
+            # 最后一个桶收集超出所有上限的请求
+            self.histogram = [0] * (len(self.buckets_ms) + 1)
+
+    def record_response(self, status_code, latency):
+        with self._lock:
+            self.requests += 1
+            self.status_counts[status_code] = self.status_counts.get(status_code, 0) + 1
+            self.histogram[bisect_left(self.buckets_ms, latency * 1000)] += 1
+
+    def record_error(self):
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_bytes(self, size):
+        with self._lock:
+            self.bytes += size
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={bucket}ms" for bucket in self.buckets_ms] + [f">{self.buckets_ms[-1]}ms"]
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'errors': self.errors,
+                'bytes': self.bytes,
+                'status_counts': dict(self.status_counts),
+                'latency_histogram': dict(zip(labels, self.histogram))
+            }
+
+
+class HttpClient:
+    def __init__(self):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_CONFIG['pool_connections'],
+            pool_maxsize=HTTP_CONFIG['pool_maxsize']
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers['User-Agent'] = COLES_CONFIG['user_agent']
+
+        self.stats = HttpStats()
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+
+    def _host_slot(self, url):
+        """每个域名一个信号量，限制同时进行的请求数"""
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(HTTP_CONFIG['per_host_concurrency'])
+            return self._host_slots[host]
+
+    def _backoff(self, attempt, response=None):
+        """指数退避加随机抖动，服务器给了 Retry-After 时以它为准"""
+        base_delay = SCRAPER_CONFIG['delay_between_requests']
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return base_delay * (2 ** attempt) + random.uniform(0, base_delay)
+
+    def _send(self, method, url, **kwargs):
+        """发送请求，连接错误和临时性状态码按 retry_times 重试"""
+        kwargs.setdefault('timeout', SCRAPER_CONFIG['timeout'])
+        retries = SCRAPER_CONFIG['retry_times']
+
+        for attempt in range(retries + 1):
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.stats.record_error()
+                if attempt == retries:
+                    raise
+                delay = self._backoff(attempt)
+                logging.warning(f"请求失败({e})，{delay:.1f} 秒后重试: {url}")
+            else:
+                self.stats.record_response(response.status_code, time.perf_counter() - started)
+                if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                    return response
+                delay = self._backoff(attempt, response)
+                response.close()
+                logging.warning(f"HTTP {response.status_code}，{delay:.1f} 秒后重试: {url}")
+
+            self.stats.record_retry()
+            time.sleep(delay)
+
+    def request(self, method, url, **kwargs):
+        """普通请求，响应体读取完毕后才释放域名并发名额"""
+        with self._host_slot(url):
+            response = self._send(method, url, **kwargs)
+            self.stats.record_bytes(len(response.content))
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    @contextmanager
+    def stream(self, method, url, **kwargs):
+        """流式请求，在调用方读完响应体之前一直占用域名并发名额"""
+        with self._host_slot(url):
+            response = self._send(method, url, stream=True, **kwargs)
+            try:
+                yield response
+            finally:
+                tell = getattr(response.raw, 'tell', None)
+                if tell:
+                    self.stats.record_bytes(tell())
+                response.close()
+
+    def log_stats(self):
+        """输出请求统计"""
+        stats = self.stats.snapshot()
+        logging.info(
+            f"HTTP统计: {stats['requests']} 次请求, {stats['retries']} 次重试, "
+            f"{stats['errors']} 次错误, {stats['bytes'] / (1024 * 1024):.2f} MB"
+        )
+        logging.info(f"HTTP状态码: {stats['status_counts']}")
+        logging.info(f"HTTP延迟分布: {stats['latency_histogram']}")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_http_client():
+    """获取进程内共享的HTTP客户端"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
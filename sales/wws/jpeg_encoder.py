@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+JPEG预算编码 - 每页二分查找达到感知质量阈值(PSNR)的最低质量，超出字节预算时改取预算内的最高质量；
+统一使用渐进式和优化哈夫曼表，色度抽样按页比较 4:4:4 和 4:2:0，取文件更小的一种
+"""
+
+import io
+import math
+from collections import namedtuple
+from PIL import Image, ImageChops, ImageStat
+from config import SCRAPER_CONFIG, ENCODER_CONFIG
+
+# 编码结果: JPEG字节、质量、色度抽样、PSNR、按旧方式（固定 image_quality）编码时的字节数（不测量时为None）
+EncodedJpeg = namedtuple('EncodedJpeg', ['data', 'quality', 'subsampling', 'psnr', 'baseline_size'])
+
+SUBSAMPLING_NAMES = {0: '4:4:4', 1: '4:2:2', 2: '4:2:0'}
+
+# libjpeg 标准亮度量化表（自然顺序），quality 按 IJG 公式缩放
+STANDARD_LUMINANCE = [
+    16, 11, 10, 16, 24, 40, 51, 61,
+    12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56,
+    14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77,
+    24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101,
+    72, 92, 95, 98, 112, 100, 103, 99,
+]
+
+
+def encode_jpeg(image, quality, subsampling):
+    buffer = io.BytesIO()
+    image.save(
+        buffer, 'JPEG', quality=quality, subsampling=subsampling,
+        progressive=ENCODER_CONFIG['progressive'], optimize=True
+    )
+    return buffer.getvalue()
+
+
+def legacy_jpeg_size(image):
+    """旧流程 image.save(path, 'JPEG', quality=image_quality) 的字节数：基线JPEG、不优化哈夫曼表、默认色度抽样"""
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=SCRAPER_CONFIG['image_quality'])
+    return buffer.tell()
+
+
+def scaled_luminance(quality):
+    scale = 5000 / quality if quality < 50 else 200 - quality * 2
+    return [min(255, max(1, (value * scale + 50) // 100)) for value in STANDARD_LUMINANCE]
+
+
+def estimate_quality(image):
+    """按亮度量化表估计已打开JPEG的编码质量（1-100），非JPEG或没有量化表时返回None"""
+    tables = getattr(image, 'quantization', None)
+    if not tables or 0 not in tables or len(tables[0]) != 64:
+        return None
+    actual = list(tables[0])
+    return min(
+        range(1, 101),
+        key=lambda quality: sum(abs(a - b) for a, b in zip(scaled_luminance(quality), actual))
+    )
+
+
+def psnr(reference, data):
+    """解码后与原图逐像素比较的峰值信噪比(dB)，完全相同时为无穷大"""
+    with Image.open(io.BytesIO(data)) as decoded:
+        diff = ImageChops.difference(reference, decoded.convert(reference.mode))
+    bands = ImageStat.Stat(diff).rms
+    rms = math.sqrt(sum(value ** 2 for value in bands) / len(bands))
+    return math.inf if rms == 0 else 20 * math.log10(255 / rms)
+
+
+def _lowest_quality(predicate, high):
+    """在 [min_quality, high] 中二分查找使 predicate 成立的最低质量（假设随质量单调），没有则返回None"""
+    low = min(ENCODER_CONFIG['min_quality'], high)
+    found = None
+    while low <= high:
+        quality = (low + high) // 2
+        if predicate(quality):
+            found = quality
+            high = quality - 1
+        else:
+            low = quality + 1
+    return found
+
+
+def _search(image, subsampling, max_quality):
+    """单一色度抽样下的质量搜索（不超过 max_quality），返回 (质量, JPEG字节, PSNR)"""
+    trials = {}
+
+    def trial(quality):
+        if quality not in trials:
+            data = encode_jpeg(image, quality, subsampling)
+            trials[quality] = (data, psnr(image, data))
+        return trials[quality]
+
+    quality = _lowest_quality(lambda q: trial(q)[1] >= ENCODER_CONFIG['min_psnr'], max_quality)
+    if quality is None:
+        quality = max_quality
+    if len(trial(quality)[0]) > ENCODER_CONFIG['max_bytes']:
+        # 达到感知阈值也超预算：取预算内的最高质量（不低于 min_quality）
+        over_budget = _lowest_quality(lambda q: len(trial(q)[0]) > ENCODER_CONFIG['max_bytes'], max_quality)
+        quality = max(min(ENCODER_CONFIG['min_quality'], max_quality), over_budget - 1)
+    data, score = trial(quality)
+    return quality, data, score
+
+
+def encode_page(image, measure_baseline=True, max_quality=None):
+    """按预算/阈值编码一页，返回 EncodedJpeg
+
+    派生图传 measure_baseline=False（不做旧方式对比编码）和 max_quality=原图质量：
+    从已压缩的原图缩小后再用更高的质量编码不会更清晰，只会更大
+    """
+    max_quality = min(ENCODER_CONFIG['max_quality'], max_quality or ENCODER_CONFIG['max_quality'])
+    if image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    measure = measure_baseline and ENCODER_CONFIG['measure_baseline']
+    baseline_size = legacy_jpeg_size(image) if measure else None
+
+    best = None
+    subsamplings = ENCODER_CONFIG['subsampling'] if image.mode == 'RGB' else [0]
+    for subsampling in subsamplings:
+        quality, data, score = _search(image, subsampling, max_quality)
+        if best is None or len(data) < len(best.data):
+            best = EncodedJpeg(data, quality, subsampling, score, baseline_size)
+    return best
+
+
+def describe(encoded):
+    """日志用的编码参数摘要，如 q62 4:4:4 39.1dB"""
+    return f"q{encoded.quality} {SUBSAMPLING_NAMES[encoded.subsampling]} {encoded.psnr:.1f}dB"
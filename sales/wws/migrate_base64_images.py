@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+迁移工具 - 把 catalogue_images 中的 base64 图片搬到内容寻址blob存储，行内只保留blob路径
+
+用法:
+    python migrate_base64_images.py            # 执行迁移
+    python migrate_base64_images.py --dry-run  # 只统计，不修改
+"""
+
+import argparse
+import hashlib
+import logging
+from database import get_db_manager, decode_image_data
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def migrate(batch_size=50, dry_run=False):
+    """按主键分批迁移，单批失败只回滚该批"""
+    db = get_db_manager()
+    last_id = 0
+    migrated = 0
+    deduplicated = 0
+    failed = 0
+    bytes_before = 0
+    bytes_after = 0
+
+    while True:
+        with db.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT id, image_data FROM catalogue_images
+                WHERE id > %s AND image_data LIKE 'data:image/%%'
+                ORDER BY id LIMIT %s
+                """,
+                (last_id, batch_size)
+            )
+            rows = cursor.fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for row_id, image_data in rows:
+            last_id = row_id
+            try:
+                image_bytes = decode_image_data(image_data)
+            except ValueError as e:
+                logging.warning(f"第 {row_id} 行base64解析失败，跳过: {e}")
+                failed += 1
+                continue
+
+            if dry_run:
+                key = hashlib.sha256(image_bytes).hexdigest()
+                created = not db.blob_store.exists(key)
+            else:
+                key, created = db.blob_store.put(image_bytes)
+            blob_url = db.blob_store.url_for(key)
+            updates.append((blob_url, row_id))
+            deduplicated += 0 if created else 1
+            bytes_before += len(image_data)
+            bytes_after += len(blob_url)
+
+        if updates and not dry_run:
+            with db.cursor(commit=True) as cursor:
+                cursor.executemany("UPDATE catalogue_images SET image_data = %s WHERE id = %s", updates)
+        migrated += len(updates)
+        logging.info(f"已处理到 id={last_id}，累计迁移 {migrated} 行")
+
+    action = "可迁移" if dry_run else "已迁移"
+    logging.info(
+        f"{action} {migrated} 行（其中 {deduplicated} 行复用已有blob），失败 {failed} 行；"
+        f"image_data 列从 {bytes_before / (1024 * 1024):.2f} MB 减少到 {bytes_after / 1024:.1f} KB"
+    )
+    return migrated
+
+
+def main():
+    parser = argparse.ArgumentParser(description='迁移base64目录图片到blob存储')
+    parser.add_argument('--batch-size', type=int, default=50, help='每批处理的行数')
+    parser.add_argument('--dry-run', action='store_true', help='只统计，不写文件也不改数据库')
+    args = parser.parse_args()
+    migrate(batch_size=args.batch_size, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+多商店并发调度 - 每家商店在独立线程中运行，各自有截止时间、重试和结果记录，
+一家商店变慢或卡死不会拖住其他商店；超时的商店在下一个阶段前停止，截止后不会再发布
+"""
+
+import time
+import logging
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from config import STORES, ORCHESTRATOR_CONFIG
+
+# 单家商店的运行结果: 商店名、是否成功、尝试次数、耗时秒数、失败原因
+StoreResult = namedtuple('StoreResult', ['store', 'success', 'attempts', 'elapsed', 'error'])
+
+
+def enabled_stores(stores=None):
+    """配置中启用的商店列表"""
+    return [store for store in (stores or STORES) if store.get('enabled', True)]
+
+
+def store_option(store, key):
+    """商店单独配置优先，否则用调度默认值"""
+    return store.get(key, ORCHESTRATOR_CONFIG[f"store_{key}"])
+
+
+class StoreTimeout(Exception):
+    """商店超过截止时间，流水线在阶段之间检查到后放弃本次处理"""
+
+
+class StoreDeadline:
+    """单家商店的截止时间
+
+    流水线在每个阶段开始前 check()，发布（数据库替换 + 切换 current）放在 commit() 中：
+    到期后不会再开始发布，正在进行的发布完成后才判定超时。到期时执行 on_expire 注册的回调，
+    如关闭该商店独占的浏览器，让卡住的WebDriver调用立即出错返回
+    """
+
+    def __init__(self, name, timeout):
+        self.name = name
+        self.timeout = timeout
+        self.started = time.perf_counter()
+        self.expires_at = self.started + timeout
+        self.expired = False
+        self._callbacks = []
+        self._lock = threading.RLock()
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.perf_counter())
+
+    def due(self, now=None):
+        return (now or time.perf_counter()) >= self.expires_at
+
+    def expire(self):
+        """标记超时并执行回调；商店正在发布时等发布完成"""
+        with self._lock:
+            if self.expired:
+                return
+            self.expired = True
+            callbacks, self._callbacks = self._callbacks, []
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception as e:
+                    logging.warning(f"{self.name} 超时回调失败: {e}")
+
+    def check(self, stage=''):
+        """已超时则抛出 StoreTimeout"""
+        with self._lock:
+            if not self.expired and self.due():
+                self.expire()
+            if self.expired:
+                raise StoreTimeout(f"{self.name} 超过 {self.timeout} 秒，{stage} 前停止")
+
+    @contextmanager
+    def commit(self, stage=''):
+        """发布临界区：进入前检查截止时间，期间 expire() 会等待"""
+        with self._lock:
+            self.check(stage)
+            yield
+
+    def on_expire(self, callback):
+        with self._lock:
+            if not self.expired:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def forget(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class StoreOrchestrator:
+    def __init__(self, run_store, stores=None):
+        """run_store(store, deadline) 处理一家商店，返回True/False；deadline 为 StoreDeadline"""
+        self.run_store = run_store
+        self.stores = enabled_stores(stores)
+        self.deadlines = {}
+        self._lock = threading.Lock()
+
+    def _run_with_retries(self, store):
+        """在商店自己的截止时间内按配置重试"""
+        name = store['name']
+        retries = store_option(store, 'retries')
+        deadline = StoreDeadline(name, store_option(store, 'timeout'))
+        with self._lock:
+            self.deadlines[name] = deadline
+
+        error = None
+        attempts = 0
+        for attempt in range(retries + 1):
+            attempts = attempt + 1
+            try:
+                if self.run_store(store, deadline):
+                    return StoreResult(name, True, attempts, time.perf_counter() - deadline.started, None)
+                error = "处理失败"
+            except Exception as e:
+                error = str(e)
+                logging.error(f"{name} 第 {attempts} 次尝试异常: {e}")
+
+            if deadline.expired:
+                break
+            if attempt < retries:
+                delay = ORCHESTRATOR_CONFIG['retry_delay']
+                if deadline.remaining() <= delay:
+                    break
+                logging.info(f"{name} 第 {attempts} 次尝试失败，{delay} 秒后重试")
+                time.sleep(delay)
+
+        if deadline.expired:
+            error = "超时"
+        return StoreResult(name, False, attempts, time.perf_counter() - deadline.started, error)
+
+    def run(self):
+        """并发运行所有启用的商店，返回按配置顺序排列的结果"""
+        if not self.stores:
+            logging.warning("没有启用的商店")
+            return []
+
+        results = {}
+        expired = {}  # 商店 -> 通知超时的时间
+        grace = ORCHESTRATOR_CONFIG['cancel_grace']
+        executor = ThreadPoolExecutor(
+            max_workers=min(ORCHESTRATOR_CONFIG['max_workers'], len(self.stores)),
+            thread_name_prefix='store'
+        )
+        pending = {store['name']: (store, executor.submit(self._run_with_retries, store)) for store in self.stores}
+        try:
+            while pending:
+                now = time.perf_counter()
+                for name, (store, future) in list(pending.items()):
+                    with self._lock:
+                        deadline = self.deadlines.get(name)
+                    if future.done():
+                        results[name] = future.result()
+                        del pending[name]
+                    elif name not in expired and deadline and deadline.due(now):
+                        # 线程无法强制结束：通知商店在下一个阶段前停止，截止后不会再发布
+                        logging.error(f"{name} 超过 {deadline.timeout} 秒未完成，通知停止")
+                        deadline.expire()
+                        expired[name] = time.perf_counter()
+                    elif name in expired and now - expired[name] > grace:
+                        logging.error(f"{name} 超时后 {grace} 秒仍未停止，不再等待（截止后不会再发布）")
+                        results[name] = StoreResult(name, False, None, now - deadline.started, "超时")
+                        del pending[name]
+                if pending:
+                    time.sleep(ORCHESTRATOR_CONFIG['poll_interval'])
+        finally:
+            executor.shutdown(wait=False)
+
+        ordered = [results[store['name']] for store in self.stores]
+        self.log_results(ordered)
+        return ordered
+
+    def log_results(self, results):
+        for result in results:
+            status = "成功" if result.success else f"失败({result.error})"
+            attempts = result.attempts if result.attempts is not None else '-'
+            logging.info(f"{result.store}: {status}，尝试 {attempts} 次，耗时 {result.elapsed:.1f} s")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+页面指纹 - 用PyPDF2对每页的内容流和引用资源计算哈希，
+目录中途重发时只重新渲染内容变化的页，未变化的页沿用已发布的JPEG和数据库记录
+"""
+
+import os
+import json
+import hashlib
+import logging
+from PyPDF2 import PdfReader
+from PyPDF2.generic import IndirectObject, DictionaryObject, ArrayObject, StreamObject
+from config import SCRAPER_CONFIG, ENCODER_CONFIG
+from download_cache import resolve_cache_dir
+from renderers import selected_renderer
+
+# 不影响页面外观、且会造成循环引用的键
+SKIPPED_KEYS = {'/Parent', '/Annots', '/StructParents', '/Metadata'}
+
+
+def _stream_bytes(stream):
+    try:
+        return stream.get_data()
+    except Exception:
+        return stream._data or b''  # 不支持的压缩格式直接用原始字节
+
+
+def _digest_object(obj, digest, seen):
+    """递归把PDF对象写入哈希，同一页内已访问的间接对象只写一次（避免循环）"""
+    if isinstance(obj, IndirectObject):
+        ref = (obj.idnum, obj.generation)
+        if ref in seen:
+            digest.update(b'<ref>')
+            return
+        seen.add(ref)
+        obj = obj.get_object()
+
+    if isinstance(obj, StreamObject):
+        digest.update(b'<stream>')
+        digest.update(_stream_bytes(obj))
+    if isinstance(obj, DictionaryObject):
+        digest.update(b'<<')
+        for key in sorted(obj.keys()):
+            if key in SKIPPED_KEYS or (isinstance(obj, StreamObject) and key in ('/Length', '/Filter', '/DecodeParms')):
+                continue
+            digest.update(key.encode('utf-8'))
+            _digest_object(obj.raw_get(key), digest, seen)
+        digest.update(b'>>')
+    elif isinstance(obj, ArrayObject):
+        digest.update(b'[')
+        for item in obj:
+            _digest_object(item, digest, seen)
+        digest.update(b']')
+    else:
+        digest.update(repr(obj).encode('utf-8'))
+
+
+def page_fingerprint(page, render_signature=''):
+    """单页指纹：内容流 + 资源 + 页面尺寸/旋转 + 渲染参数"""
+    digest = hashlib.sha256(render_signature.encode('utf-8'))
+    seen = set()
+    for key in ('/Contents', '/Resources', '/MediaBox', '/CropBox', '/Rotate'):
+        if key in page:
+            digest.update(key.encode('utf-8'))
+            _digest_object(page.raw_get(key), digest, seen)
+    return digest.hexdigest()
+
+
+def render_signature():
+    """渲染参数变化时所有页都需要重建"""
+    return (
+        f"dpi={SCRAPER_CONFIG['render_dpi']};quality={SCRAPER_CONFIG['image_quality']};"
+        f"renderer={selected_renderer()};mode={SCRAPER_CONFIG['render_mode']};"
+        f"encoder={sorted(ENCODER_CONFIG.items()) if ENCODER_CONFIG['enabled'] else None}"
+    )
+
+
+def page_fingerprints(pdf_path, dpi_plan=None):
+    """返回每页指纹列表，下标0对应第1页；dpi_plan 中每页的DPI也计入指纹"""
+    reader = PdfReader(pdf_path)
+    signature = render_signature()
+    dpi_plan = dpi_plan or {}
+    return [
+        page_fingerprint(page, f"{signature};page_dpi={dpi_plan.get(page_number)}")
+        for page_number, page in enumerate(reader.pages, start=1)
+    ]
+
+
+class PageManifest:
+    """记录一家商店最近一次发布的每页指纹和图片路径"""
+
+    def __init__(self, store_name, cache_dir=None):
+        self.store_name = store_name
+        self.path = os.path.join(cache_dir or resolve_cache_dir('pages'), f"{store_name}.json")
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def plan(self, fingerprints):
+        """按指纹匹配上次发布的页（页序变化也能匹配），返回 ({页码: 旧记录}, [需重建的页码])"""
+        by_fingerprint = {}
+        for entry in self.load().values():
+            if os.path.exists(entry['file_path']):
+                by_fingerprint.setdefault(entry['fingerprint'], entry)
+
+        reused = {}
+        changed = []
+        for page_number, fingerprint in enumerate(fingerprints, start=1):
+            entry = by_fingerprint.get(fingerprint)
+            if entry:
+                reused[page_number] = entry
+            else:
+                changed.append(page_number)
+        return reused, changed
+
+    def save(self, entries):
+        """entries: {页码: {'fingerprint', 'file_path', 'db_path'}}，只在发布成功后调用"""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({str(page): entry for page, entry in entries.items()}, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.path)
+        logging.info(f"{self.store_name} 页面指纹已更新: {len(entries)} 页")
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+PDF渲染 - 按页段调度渲染后端（见 renderers），单进程顺序或多进程并行，渲染后立即写盘；
+poppler直出模式下JPEG按最终质量直接写入目标目录，不经过PIL解码和二次编码
+"""
+
+import os
+import math
+import time
+import logging
+import shutil
+import tempfile
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from pdf2image import pdfinfo_from_path
+from PyPDF2 import PdfReader
+from renderers import PopplerRenderer, RenderSizeMismatch, get_renderer, selected_renderer, pixel_size, budget_encoding
+from config import SCRAPER_CONFIG
+
+
+@contextmanager
+def pdf_source_path(pdf_source):
+    """得到可供poppler按页读取的PDF路径（字节数据只落盘一次）"""
+    if isinstance(pdf_source, (str, os.PathLike)):
+        yield os.fspath(pdf_source)
+        return
+
+    fd, temp_path = tempfile.mkstemp(suffix='.pdf')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf_source)
+        yield temp_path
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def get_page_count(pdf_path):
+    """读取PDF总页数"""
+    info = pdfinfo_from_path(pdf_path)
+    return int(info['Pages'])
+
+
+def encoded_bytes(pages):
+    """预算编码的页按固定 image_quality 编码时的总字节数和实际总字节数"""
+    encoded = [page for page in pages if page.baseline_size]
+    return sum(page.baseline_size for page in encoded), sum(page.size for page in encoded)
+
+
+def plan_page_dpi(pdf_path, overrides=None, label=''):
+    """按每页媒体框计算正好达到 max_image_size 的DPI，返回 {页码: DPI}
+
+    max_image_size 按页面方向匹配（竖版页宽高互换），poppler/pdfium 直接按该DPI渲染，
+    不需要先渲染大图再缩小。overrides 为 {页码: DPI}，用于价格表等需要更清晰的密集页。
+    adaptive_dpi 关闭时除 overrides 外都使用固定的 render_dpi。
+    """
+    overrides = overrides or {}
+    max_w, max_h = SCRAPER_CONFIG['max_image_size']
+    plan = {}
+    for page_number, page in enumerate(PdfReader(pdf_path).pages, start=1):
+        width_pt, height_pt = float(page.mediabox.width), float(page.mediabox.height)
+        if (page.rotation or 0) % 180:
+            width_pt, height_pt = height_pt, width_pt
+        if page_number in overrides:
+            dpi = overrides[page_number]
+        elif SCRAPER_CONFIG['adaptive_dpi']:
+            target_w, target_h = (max_w, max_h) if width_pt >= height_pt else (max_h, max_w)
+            # 向下取两位小数，保证 pdftoppm 向上取整后也不超过目标尺寸
+            dpi = math.floor(min(target_w / width_pt, target_h / height_pt) * 72 * 100) / 100
+            dpi = min(max(dpi, SCRAPER_CONFIG['min_render_dpi']), SCRAPER_CONFIG['max_render_dpi'])
+        else:
+            dpi = SCRAPER_CONFIG['render_dpi']
+        plan[page_number] = dpi
+        width, height = pixel_size(width_pt, height_pt, 0, dpi)
+        source = "（指定）" if page_number in overrides else ""
+        logging.info(
+            f"{label}第{page_number}页: 媒体框 {width_pt:.0f}x{height_pt:.0f} pt -> "
+            f"{dpi:g} DPI{source}, {width}x{height} px"
+        )
+    return plan
+
+
+def _render_page_range(pdf_path, first_page, last_page, output_dir, url_prefix, date_str, backend, dpi=None):
+    """工作进程：用指定后端渲染一段连续页，只返回路径、大小和耗时；
+    后端输出尺寸与 pdftoppm 不一致时这一段改用 poppler 重新渲染"""
+    try:
+        return get_renderer(backend).render_range(
+            pdf_path, first_page, last_page, output_dir, url_prefix, date_str, dpi=dpi
+        )
+    except RenderSizeMismatch as e:
+        if backend == 'poppler':
+            raise
+        logging.warning(f"{backend} 渲染尺寸与 poppler 不一致，第 {first_page}-{last_page} 页改用 poppler: {e}")
+        return get_renderer('poppler').render_range(
+            pdf_path, first_page, last_page, output_dir, url_prefix, date_str, dpi=dpi
+        )
+
+
+def _page_ranges(page_numbers, chunk_size, dpi_plan=None):
+    """把页码切分成DPI相同的连续页段 (首页, 末页, DPI)，每段不超过 chunk_size 页"""
+    dpi_plan = dpi_plan or {}
+    ranges = []
+    for page_number in sorted(page_numbers):
+        dpi = dpi_plan.get(page_number)
+        if (ranges and page_number == ranges[-1][1] + 1 and page_number - ranges[-1][0] < chunk_size
+                and dpi == ranges[-1][2]):
+            ranges[-1][1] = page_number
+        else:
+            ranges.append([page_number, page_number, dpi])
+    return [tuple(page_range) for page_range in ranges]
+
+
+def _render_parallel(pdf_path, chunks, output_dir, url_prefix, date_str, workers, backend):
+    """把页段交给进程池并行渲染"""
+    results = []
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+        futures = [
+            executor.submit(
+                _render_page_range, pdf_path, first_page, last_page, output_dir, url_prefix, date_str, backend, dpi
+            )
+            for first_page, last_page, dpi in chunks
+        ]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+
+def estimate_direct_savings(pdf_path, results, label='', dpi_plan=None):
+    """抽样把直出的前几页再按PIL方式渲染一遍，按每页平均值估算整本节省的时间和字节"""
+    sample = [page for page, _, _ in results[:SCRAPER_CONFIG['render_compare_pages']]]
+    if not sample:
+        return None
+
+    temp_dir = tempfile.mkdtemp(prefix='render-compare-')
+    try:
+        pil_time = 0.0
+        pil_bytes = 0
+        for page in sample:
+            for pil_page, render_time, encode_time in PopplerRenderer('pil').render_range(
+                pdf_path, page.page_number, page.page_number, temp_dir, '', 'compare',
+                dpi=(dpi_plan or {}).get(page.page_number)
+            ):
+                pil_time += render_time + encode_time
+                pil_bytes += pil_page.size
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    direct_time = sum(render_time for _, render_time, _ in results[:len(sample)])
+    direct_bytes = sum(page.size for page in sample)
+    scale = len(results) / len(sample)
+    saved_time = (pil_time - direct_time) * scale
+    saved_bytes = (pil_bytes - direct_bytes) * scale
+    logging.info(
+        f"{label}直出模式（按 {len(sample)} 页抽样估算）: 整本节省 {saved_time:.2f} s，"
+        f"{saved_bytes / 1024:.0f} KB（PIL方式每页 {pil_bytes / len(sample) / 1024:.0f} KB，"
+        f"直出每页 {direct_bytes / len(sample) / 1024:.0f} KB）"
+    )
+    return saved_time, saved_bytes
+
+
+def render_pdf_to_disk(pdf_source, output_dir, url_prefix, date_str=None, label='', pages=None, dpi_plan=None):
+    """渲染PDF并逐页保存为JPEG，返回按页码排序的 RenderedPage 列表
+
+    render_workers > 1 时按 render_chunk_size 切分页段并行渲染，
+    否则在当前进程中流式渲染。两种方式输出的文件名完全一致。
+    后端由 renderers.selected_renderer 决定；poppler 且 render_mode 为 direct 时
+    直接写出最终JPEG，并抽样估算相对PIL方式节省的时间和字节。
+    pages 为页码列表时只渲染这些页（增量重建），None 表示全部页。
+    dpi_plan 为 plan_page_dpi 的结果 {页码: DPI}，None 时所有页使用 render_dpi。
+    """
+    date_str = date_str or time.strftime('%Y%m%d')
+    workers = SCRAPER_CONFIG['render_workers']
+    chunk_size = max(1, SCRAPER_CONFIG['render_chunk_size'])
+    backend = selected_renderer()
+    os.makedirs(output_dir, exist_ok=True)
+
+    started = time.perf_counter()
+    with pdf_source_path(pdf_source) as pdf_path:
+        if pages is None:
+            pages = range(1, get_page_count(pdf_path) + 1)
+        page_numbers = sorted(set(pages))
+        if not page_numbers:
+            return []
+
+        if workers > 1 and len(page_numbers) > chunk_size:
+            chunks = _page_ranges(page_numbers, chunk_size, dpi_plan)
+            logging.info(
+                f"{label}使用 {workers} 个进程并行渲染 {len(page_numbers)} 页，共 {len(chunks)} 段（{backend}）"
+            )
+            results = _render_parallel(pdf_path, chunks, output_dir, url_prefix, date_str, workers, backend)
+        else:
+            results = []
+            for first_page, last_page, dpi in _page_ranges(page_numbers, len(page_numbers), dpi_plan):
+                results.extend(
+                    _render_page_range(pdf_path, first_page, last_page, output_dir, url_prefix, date_str, backend, dpi)
+                )
+
+        results.sort(key=lambda item: item[0].page_number)
+        elapsed = time.perf_counter() - started
+        if backend == 'poppler' and SCRAPER_CONFIG['render_mode'] == 'direct' and not budget_encoding():
+            try:
+                estimate_direct_savings(pdf_path, results, label, dpi_plan)
+            except Exception as e:
+                logging.warning(f"{label}直出节省估算失败: {e}")
+
+    total_render = 0.0
+    total_encode = 0.0
+    for page, render_time, encode_time in results:
+        total_render += render_time
+        total_encode += encode_time
+        encoding = f", {page.encoding}" if page.encoding else ""
+        if page.baseline_size:
+            encoding += f"（旧方式 {page.baseline_size} bytes）"
+        logging.info(
+            f"{label}第{page.page_number}页: {os.path.basename(page.file_path)} ({page.size} bytes{encoding}) "
+            f"渲染 {render_time * 1000:.0f} ms, 编码 {encode_time * 1000:.0f} ms"
+        )
+
+    pages = [page for page, _, _ in results]
+    logging.info(
+        f"{label}渲染完成（{backend}），共 {len(pages)} 页，"
+        f"{sum(page.size for page in pages) / (1024 * 1024):.1f} MB，"
+        f"总耗时 {elapsed:.2f} s (渲染 {total_render:.2f} s, 编码 {total_encode:.2f} s)"
+    )
+    before, after = encoded_bytes(pages)
+    if before:
+        logging.info(
+            f"{label}预算编码: 旧方式 {before / (1024 * 1024):.2f} MB -> {after / (1024 * 1024):.2f} MB"
+            f"（节省 {(1 - after / before) * 100:.0f}%）"
+        )
+    return pages
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+感知哈希 - 用dHash识别跨周、跨商店几乎相同的页面（封底、营业时间页、固定促销页），
+相同页面只保留一份文件，后续目录行直接引用已有图片
+"""
+
+import os
+import logging
+from collections import namedtuple
+from PIL import Image, ImageChops
+from config import PHASH_CONFIG
+
+# 页面哈希: 数据库路径、64位dHash、图片宽、高
+PageHash = namedtuple('PageHash', ['image_path', 'dhash', 'width', 'height'])
+
+
+def dhash(image, hash_size=8):
+    """差值哈希：缩成 (hash_size+1) x hash_size 灰度图，比较相邻像素明暗得到 hash_size² 位整数"""
+    small = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count('1')
+
+
+def images_match(path_a, path_b):
+    """dHash只用于快速筛选候选；再按缩小后的灰度图逐像素比较，避免只改了价格的页面被当成重复"""
+    width = PHASH_CONFIG['verify_width']
+    with Image.open(path_a) as a, Image.open(path_b) as b:
+        if a.size != b.size:
+            return False
+        size = (width, max(1, round(a.height * width / a.width)))
+        a_small = a.convert('L').resize(size, Image.BOX)
+        b_small = b.convert('L').resize(size, Image.BOX)
+        return ImageChops.difference(a_small, b_small).getextrema()[1] <= PHASH_CONFIG['max_pixel_delta']
+
+
+def hash_page(file_path, image_path):
+    with Image.open(file_path) as image:
+        return PageHash(image_path, dhash(image), image.width, image.height)
+
+
+def deduplicate_pages(db, pages, resolve_path, label='', seen=None):
+    """pages: [(页码, 本地文件路径, 数据库路径)] 本次新渲染的页；seen: 同一版本之前批次的新页面 PageHash
+
+    与索引表中尺寸相同、dHash距离不超过 max_distance、逐像素复核通过且文件仍存在的页视为重复：
+    删除新文件，改为引用已有图片。返回 ({页码: 已有图片的数据库路径}, 新页面的 PageHash 列表)，
+    新哈希由调用方在版本发布后再写入索引表，避免其他商店引用尚未发布的文件。
+    """
+    duplicates = {}
+    new_hashes = []
+    for page_number, file_path, image_path in pages:
+        page_hash = hash_page(file_path, image_path)
+        # 先比较本次已处理的新页（同一本目录内的重复页），再查索引表
+        candidates = [
+            known.image_path for known in list(seen or []) + new_hashes
+            if (known.width, known.height) == (page_hash.width, page_hash.height)
+            and hamming_distance(known.dhash, page_hash.dhash) <= PHASH_CONFIG['max_distance']
+        ] + db.find_similar_pages(page_hash, PHASH_CONFIG['max_distance'])
+
+        match = None
+        for candidate in candidates:
+            candidate_file = resolve_path(candidate)
+            if (candidate != image_path and candidate_file and os.path.exists(candidate_file)
+                    and images_match(file_path, candidate_file)):
+                match = candidate
+                break
+
+        if match:
+            os.remove(file_path)  # 新文件还在未发布的版本目录中，没有读者引用
+            duplicates[page_number] = match
+            logging.info(f"{label}第{page_number}页与已有图片相同，改为引用: {match}")
+        else:
+            new_hashes.append(page_hash)
+
+    logging.info(f"{label}感知哈希去重: {len(pages)} 个新页中 {len(duplicates)} 页复用已有图片")
+    return duplicates, new_hashes
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+目录处理流水线 - 所有商店共用的 发现 → 下载 → 渲染到版本暂存目录 → 校验 → 原子发布（可按批次渐进发布） → 回收 流程，
+商店差异只在 store_adapters 中；每个阶段可单独调用并记录耗时，便于分别做基准测试
+"""
+
+import os
+import time
+import shutil
+import logging
+import threading
+from datetime import date, timedelta
+from contextlib import contextmanager, nullcontext
+from database import get_db_manager, CatalogueHeader
+from pdf_render import render_pdf_to_disk, plan_page_dpi, encoded_bytes, get_page_count
+from download_cache import DownloadCache
+from http_client import get_http_client
+from browser_session import get_browser_session
+from catalogue_discovery import CatalogueDiscovery
+from orchestrator import StoreOrchestrator, enabled_stores
+from store_adapters import get_adapter
+from page_fingerprint import PageManifest, page_fingerprints
+from derivatives import generate_variants, variant_files
+from tiles import generate_tiles, tile_paths
+from phash import deduplicate_pages
+from catalogue_versions import CatalogueVersions, VERSIONS_DIR, new_version_id
+from renderers import page_filename
+from config import SCRAPER_CONFIG, TILE_CONFIG, PHASH_CONFIG, BLOB_STORE_CONFIG, PROGRESSIVE_CONFIG
+
+
+def resolve_images_root():
+    """本地图片根目录，相对路径按爬虫目录解析"""
+    root = SCRAPER_CONFIG['images_root']
+    if not os.path.isabs(root):
+        root = os.path.join(os.path.dirname(os.path.abspath(__file__)), root)
+    return os.path.normpath(root)
+
+
+class CataloguePipeline:
+    def __init__(self, headless=True):
+        self.browser = get_browser_session(headless=headless)
+        self.download_cache = DownloadCache()
+        self.discovery = CatalogueDiscovery()
+        self.images_root = resolve_images_root()
+        self.url_prefix = SCRAPER_CONFIG['images_url_prefix']
+        self.stage_times = {}
+        self.page_stats = {}  # 商店 -> (复用页数, 重建页数)
+        self.dedupe_stats = {}  # 商店 -> 感知哈希去重的页数
+        self.byte_stats = {}  # 商店 -> (本次渲染页按旧方式编码的字节数, 预算编码后的字节数)
+        self.first_page_times = {}  # 商店 -> 从开始处理到第一批页面对读者可见的秒数
+        self.deadlines = {}  # 商店 -> 调度器给出的 StoreDeadline，阶段之间检查
+        self._stats_lock = threading.Lock()
+
+    def images_dir(self, adapter):
+        path = os.path.join(self.images_root, adapter.name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def local_path(self, db_path):
+        """数据库中的图片路径对应的本地文件（去重后可能属于其他商店目录），blob存储和外部地址返回None"""
+        prefix = f"{self.url_prefix}/"
+        if not db_path.startswith(prefix) or db_path.startswith(f"{BLOB_STORE_CONFIG['url_prefix']}/"):
+            return None
+        return os.path.join(self.images_root, *db_path[len(prefix):].split('/'))
+
+    @contextmanager
+    def stage(self, store_name, stage_name):
+        """记录某家商店某个阶段的耗时；商店已超过截止时间时抛出 StoreTimeout，不再开始新阶段"""
+        deadline = self.deadlines.get(store_name)
+        if deadline:
+            deadline.check(stage_name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._stats_lock:
+                times = self.stage_times.setdefault(store_name, {})
+                times[stage_name] = times.get(stage_name, 0.0) + elapsed  # 渐进发布时同一阶段按批次累计
+
+    def commit(self, adapter, stage_name='publish'):
+        """发布临界区（数据库替换 + 切换 current）：超过截止时间后不再开始，正在进行的发布不会被打断"""
+        deadline = self.deadlines.get(adapter.name)
+        return deadline.commit(stage_name) if deadline else nullcontext()
+
+    def _discover_with_browser(self, adapter):
+        """浏览器回退路径：该商店独占一个浏览器（按需启动或重启崩溃的），在独立标签页中查找PDF，
+        截止时间到时浏览器被关闭，不影响其他商店"""
+        try:
+            with self.browser.tab(adapter.name, deadline=self.deadlines.get(adapter.name)) as driver:
+                return adapter.browser_discover(driver)
+        except Exception as e:
+            logging.error(f"{adapter.name} 浏览器查找PDF失败: {e}")
+            return None
+
+    def discover(self, adapter):
+        """先走HTTP快速路径，失败再用适配器的浏览器流程"""
+        with self.stage(adapter.name, 'discover'):
+            fallback = (lambda: self._discover_with_browser(adapter)) if adapter.browser_flow else None
+            return self.discovery.discover(
+                adapter.name,
+                adapter.catalogue_url,
+                browser_fallback=fallback,
+                preferred_text=adapter.preferred_text
+            )
+
+    def fetch(self, adapter, pdf_url):
+        """下载PDF文件（带ETag/Last-Modified条件请求缓存）"""
+        with self.stage(adapter.name, 'fetch'):
+            try:
+                logging.info(f"正在下载 {adapter.name} PDF...")
+                result = self.download_cache.fetch(pdf_url, timeout=60)
+                if result:
+                    source = "本地缓存" if result.from_cache else "网络"
+                    logging.info(f"{adapter.name} PDF获取成功({source})，大小: {result.size / (1024 * 1024):.2f} MB")
+                return result
+
+            except Exception as e:
+                logging.error(f"{adapter.name} PDF下载失败: {e}")
+                return None
+
+    def versions(self, adapter):
+        return CatalogueVersions(self.images_dir(adapter), f"{self.url_prefix}/{adapter.name}")
+
+    def plan(self, adapter, pdf_path):
+        """读取每页尺寸和指纹，返回 (DPI计划, 指纹列表, {页码: 可复用的清单项}, [需重建的页码])
+
+        指纹无法计算时指纹列表为 None，整本重建
+        """
+        with self.stage(adapter.name, 'plan'):
+            try:
+                dpi_plan = plan_page_dpi(pdf_path, adapter.dpi_overrides, label=f"{adapter.name} ")
+            except Exception as e:
+                logging.warning(f"{adapter.name} 页面尺寸读取失败，使用固定DPI: {e}")
+                dpi_plan = None
+            try:
+                fingerprints = page_fingerprints(pdf_path, dpi_plan)
+                reused, changed = PageManifest(adapter.name).plan(fingerprints)
+            except Exception as e:
+                logging.warning(f"{adapter.name} 页面指纹计算失败，整本重新渲染: {e}")
+                fingerprints, reused, changed = None, {}, list(range(1, get_page_count(pdf_path) + 1))
+            logging.info(f"{adapter.name} 共 {len(reused) + len(changed)} 页：复用 {len(reused)} 页，重建 {len(changed)} 页")
+            return dpi_plan, fingerprints, reused, changed
+
+    def render(self, adapter, pdf_path, output_dir, url_prefix, pages, dpi_plan=None, date_str=None):
+        """把 pages 渲染到版本暂存目录，返回 [(页码, 本地路径, 数据库路径)]，失败返回None"""
+        with self.stage(adapter.name, 'render'):
+            try:
+                if pages:
+                    logging.info(f"正在转换 {adapter.name} PDF为图片：第 {pages[0]}-{pages[-1]} 页...")
+                rendered = render_pdf_to_disk(
+                    pdf_path,
+                    output_dir,
+                    url_prefix,
+                    date_str=date_str or date.today().strftime('%Y%m%d'),
+                    label=f"{adapter.name} ",
+                    pages=pages,
+                    dpi_plan=dpi_plan
+                )
+                before, after = encoded_bytes(rendered)
+                with self._stats_lock:
+                    reused, rebuilt = self.page_stats.get(adapter.name, (0, 0))
+                    self.page_stats[adapter.name] = (reused, rebuilt + len(rendered))
+                    total_before, total_after = self.byte_stats.get(adapter.name, (0, 0))
+                    self.byte_stats[adapter.name] = (total_before + before, total_after + after)
+                return [(page.page_number, page.file_path, page.db_path) for page in rendered]
+
+            except Exception as e:
+                logging.error(f"{adapter.name} PDF转换失败: {e}")
+                return None
+
+    def batches(self, adapter, pages):
+        """渐进发布的批次：封面（最前面的 first_batch_pages 页）先单独一批，其余按页序每 batch_size 页一批；
+        非渐进模式只有一批"""
+        pages = sorted(pages)
+        if not self.progressive(adapter):
+            return [pages]
+        first = PROGRESSIVE_CONFIG['first_batch_pages']
+        size = PROGRESSIVE_CONFIG['batch_size']
+        batches = [pages[:first]] + [pages[index:index + size] for index in range(first, len(pages), size)]
+        return [batch for batch in batches if batch] or [[]]
+
+    def progressive(self, adapter):
+        return adapter.store.get('progressive', PROGRESSIVE_CONFIG['enabled'])
+
+    def validate(self, adapter, versions, image_paths, total_pages):
+        """发布前校验：页码不重复且在范围内（全部上线时必须从1连续到最后一页）、每页图片都能找到并解码"""
+        with self.stage(adapter.name, 'validate'):
+            page_numbers = [page_number for page_number, _ in image_paths]
+            complete = len(page_numbers) == total_pages
+            expected = list(range(1, total_pages + 1))
+            if not page_numbers or (page_numbers != expected if complete else not set(page_numbers) < set(expected)):
+                logging.error(f"{adapter.name} 版本校验失败: 页码异常 {page_numbers}")
+                return False
+            files = [self.local_path(db_path) for _, db_path in image_paths]
+            if None in files:
+                logging.error(f"{adapter.name} 版本校验失败: 存在无法定位的图片路径")
+                return False
+            return versions.validate(files)
+
+    def include_pages(self, adapter, versions, version, image_paths, date_str):
+        """把复用/去重引用的、不在本版本目录中的页面按本版本的文件名链接进来，失败返回False"""
+        with self.stage(adapter.name, 'include'):
+            files = {}
+            for page_number, db_path in image_paths:
+                source_path = self.local_path(db_path)
+                if source_path:
+                    files[page_filename(date_str, page_number)] = source_path
+            try:
+                added = versions.include(version, files)
+            except OSError as e:
+                logging.error(f"{adapter.name} 复用页面链接进版本目录失败: {e}")
+                return False
+            if added:
+                logging.info(f"{adapter.name} {added} 个复用/去重页面已链接进版本目录 {version}")
+            return True
+
+    def build(self, adapter, pdf_path, versions, version, header, started):
+        """渲染并发布一个版本：每批 渲染 → 去重 → 派生图/瓦片 → 校验 → 发布，第一批发布后切换 current
+
+        渐进模式下每批提交后读者即可看到已完成的页，目录头 is_complete 在最后一批才为1；
+        非渐进模式只有一批，即整本一次性发布。成功返回 (image_paths, 指纹清单, 新页面哈希, 旧记录路径)，失败返回None
+        """
+        output_dir = versions.version_dir(version)
+        url_prefix = versions.version_url(version)
+        date_str = date.today().strftime('%Y%m%d')
+        dpi_plan, fingerprints, reused, changed = self.plan(adapter, pdf_path)
+        total_pages = len(reused) + len(changed)
+        header = header._replace(page_count=total_pages)  # 每批都记录整本页数，未完成时读者可知还差多少页
+        with self._stats_lock:
+            self.page_stats[adapter.name] = (len(reused), 0)
+
+        entries = {page_number: dict(entry) for page_number, entry in reused.items()}
+        page_hashes = []
+        old_paths = None
+        batches = self.batches(adapter, changed)
+        for index, batch in enumerate(batches, start=1):
+            rendered = self.render(adapter, pdf_path, output_dir, url_prefix, batch, dpi_plan, date_str)
+            if rendered is None:
+                return None
+            for page_number, file_path, db_path in rendered:
+                entries[page_number] = {'file_path': file_path, 'db_path': db_path}
+            image_paths = sorted((page_number, entry['db_path']) for page_number, entry in entries.items())
+            image_paths, new_hashes = self.dedupe(adapter, image_paths, entries, rendered, seen=page_hashes)
+            page_hashes.extend(new_hashes)
+            self.derive(adapter, image_paths)
+            self.tile(adapter, pdf_path, image_paths)
+            if not self.validate(adapter, versions, image_paths, total_pages):
+                return None
+            # 数据库仍引用原文件（去重/回收按引用计算），版本目录中放一份链接，切换 current 后目录本身也是完整的
+            if not self.include_pages(adapter, versions, version, image_paths, date_str):
+                return None
+
+            complete = index == len(batches)
+            if old_paths is None:
+                header = header._replace(first_page_seconds=round(time.perf_counter() - started, 2))
+            with self.commit(adapter):
+                paths = self.publish(adapter, image_paths, header._replace(is_complete=complete))
+                if paths is None:
+                    return None
+                if old_paths is None:
+                    versions.flip(version)
+            if old_paths is None:
+                old_paths = paths
+                with self._stats_lock:
+                    self.first_page_times[adapter.name] = header.first_page_seconds
+                logging.info(f"{adapter.name} 首页可见耗时 {header.first_page_seconds:.2f} s")
+            if not complete:
+                logging.info(f"{adapter.name} 渐进发布: 已上线 {len(image_paths)}/{total_pages} 页")
+
+        if fingerprints is None:
+            entries = {}
+        for page_number, entry in entries.items():
+            entry['fingerprint'] = fingerprints[page_number - 1]
+        return image_paths, entries, page_hashes, old_paths
+
+    def abandon(self, adapter, versions, version, snapshot, previous_version):
+        """版本构建失败：已有批次上线时把在线目录恢复为发布前的快照、current 指回 previous_version，
+        再丢弃暂存目录；发布前没有在线目录（或快照读取失败）时保留已上线的部分"""
+        db = get_db_manager()
+        if versions.current() == version:
+            if not snapshot or not snapshot.rows:
+                logging.warning(f"{adapter.name} 渐进发布中断且发布前没有在线目录，保留已上线的页面（未完成）")
+                return
+            if not db.restore_catalogue(adapter.name, snapshot):
+                logging.error(f"{adapter.name} 恢复发布前的目录失败，保留已上线的页面（未完成）")
+                return
+            versions.restore(previous_version)
+            logging.info(f"{adapter.name} 已恢复发布前的目录（{previous_version or '平铺目录'}）")
+        db.delete_catalogue(adapter.name, version)
+        versions.discard(version, db)
+
+    def catalogue_header(self, adapter, pdf_url, download, version):
+        """目录头：有效期取今天所在的目录周（从 catalogue_start_weekday 起 catalogue_valid_days 天）"""
+        today = date.today()
+        valid_from = today - timedelta(days=(today.weekday() - SCRAPER_CONFIG['catalogue_start_weekday']) % 7)
+        valid_to = valid_from + timedelta(days=SCRAPER_CONFIG['catalogue_valid_days'] - 1)
+        return CatalogueHeader(
+            adapter.name, adapter.region, version, today, valid_from, valid_to, pdf_url, download.sha256
+        )
+
+    def publish(self, adapter, image_paths, header=None):
+        """整批暂存后原子替换数据库中的旧目录并记录目录历史，成功返回旧记录的路径列表"""
+        with self.stage(adapter.name, 'publish'):
+            try:
+                old_paths = get_db_manager().replace_catalogue(adapter.name, image_paths, date.today(), header)
+                if old_paths is not None:
+                    logging.info(f"成功保存 {len(image_paths)} 条 {adapter.name} 记录到数据库")
+                return old_paths
+
+            except Exception as e:
+                logging.error(f"保存 {adapter.name} 数据到数据库失败: {e}")
+                return None
+
+    def dedupe(self, adapter, image_paths, entries, rendered, seen=None):
+        """新渲染的页与已有页面感知哈希相同时改为引用已有图片
+
+        seen 为本版本之前批次的新页面哈希（尚未写入索引表）。
+        返回 (更新后的 image_paths, 待发布后写入索引的新页面哈希)
+        """
+        if not PHASH_CONFIG['enabled'] or not rendered:
+            return image_paths, []
+        with self.stage(adapter.name, 'dedupe'):
+            try:
+                duplicates, new_hashes = deduplicate_pages(
+                    get_db_manager(), rendered, self.local_path, label=f"{adapter.name} ", seen=seen
+                )
+            except Exception as e:
+                logging.warning(f"{adapter.name} 感知哈希去重失败，保留新渲染的图片: {e}")
+                return image_paths, []
+
+            with self._stats_lock:
+                self.dedupe_stats[adapter.name] = self.dedupe_stats.get(adapter.name, 0) + len(duplicates)
+            for page_number, image_path in duplicates.items():
+                if page_number in entries:
+                    entries[page_number].update(file_path=self.local_path(image_path), db_path=image_path)
+            image_paths = [(page_number, duplicates.get(page_number, db_path)) for page_number, db_path in image_paths]
+            return image_paths, new_hashes
+
+    def derive(self, adapter, image_paths):
+        """为还没有派生图的页生成缩略图/移动端/完整图并记录到数据库，失败不影响发布原图"""
+        with self.stage(adapter.name, 'derive'):
+            try:
+                pages = []
+                for _, db_path in image_paths:
+                    source_path = self.local_path(db_path)
+                    if source_path and not all(os.path.exists(path) for path in variant_files(source_path)):
+                        pages.append((source_path, db_path))
+                if not pages:
+                    logging.info(f"{adapter.name} 所有页的派生图均已存在")
+                    return True
+                variants = generate_variants(pages, label=f"{adapter.name} ")
+                return get_db_manager().save_variants(variants)
+
+            except Exception as e:
+                logging.warning(f"{adapter.name} 派生图生成失败，仅发布原图: {e}")
+                return False
+
+    def tile(self, adapter, pdf_path, image_paths):
+        """可选阶段：为还没有瓦片的页生成DZI瓦片金字塔，失败不影响发布原图"""
+        if not TILE_CONFIG['enabled']:
+            return True
+        with self.stage(adapter.name, 'tiles'):
+            try:
+                pages = []
+                for page_number, db_path in image_paths:
+                    source_path = self.local_path(db_path)
+                    if source_path and not os.path.exists(tile_paths(source_path)[0]):
+                        pages.append((page_number, source_path, db_path))
+                if not pages:
+                    return True
+                variants = generate_tiles(pdf_path, pages, label=f"{adapter.name} ")
+                return get_db_manager().save_variants(variants)
+
+            except Exception as e:
+                logging.warning(f"{adapter.name} 瓦片生成失败，仅发布原图: {e}")
+                return False
+
+    def clean_old_files(self, adapter, old_paths, image_paths):
+        """新目录生效后，删除不再被任何商店引用的旧平铺图片及其派生图和瓦片（blob存储中的共享文件不动）"""
+        with self.stage(adapter.name, 'clean'):
+            db = get_db_manager()
+            current_paths = {file_path for _, file_path in image_paths}
+            # 版本目录中的文件由 collect_garbage 按目录回收，这里只处理旧的平铺文件
+            candidates = {
+                file_path for file_path in old_paths
+                if file_path not in current_paths and self.local_path(file_path)
+                and f"/{VERSIONS_DIR}/" not in file_path
+            }
+            # 去重后同一文件可能被其他商店或其他页引用，这些文件保留
+            removed_paths = sorted(candidates - db.referenced_image_paths(list(candidates)))
+            deleted_files = 0
+            for file_path in removed_paths:
+                actual_file_path = self.local_path(file_path)
+                dzi_path, tiles_dir = tile_paths(actual_file_path)
+                for path in [actual_file_path, dzi_path] + variant_files(actual_file_path):
+                    if not os.path.exists(path):
+                        continue
+                    try:
+                        os.remove(path)
+                        deleted_files += 1
+                    except OSError as e:
+                        logging.warning(f"删除文件失败 {path}: {e}")
+                shutil.rmtree(tiles_dir, ignore_errors=True)
+            db.delete_variants(removed_paths)
+            db.delete_page_hashes(removed_paths)
+            logging.info(f"{adapter.name} 删除了 {deleted_files} 个旧图片文件")
+            return deleted_files
+
+    def run_store(self, store, deadline=None):
+        """处理一家商店，store 可以是商店名或 STORES 中的一项；deadline 为调度器的 StoreDeadline，
+        超时后在下一个阶段前停止（已上线的批次恢复为上一期目录）"""
+        adapter = get_adapter(store)
+        started = time.perf_counter()
+        with self._stats_lock:
+            for stats in (self.stage_times, self.page_stats, self.dedupe_stats, self.byte_stats, self.first_page_times):
+                stats.pop(adapter.name, None)
+            if deadline:
+                self.deadlines[adapter.name] = deadline
+        try:
+            logging.info(f"开始处理 {adapter.name}...")
+
+            pdf_url = self.discover(adapter)
+            if not pdf_url:
+                logging.error(f"未找到 {adapter.name} 的PDF链接")
+                return False
+
+            download = self.fetch(adapter, pdf_url)
+            if not download:
+                return False
+
+            # 内容与上次成功发布的一致，跳过渲染和入库
+            if download.already_published:
+                logging.info(f"✅ {adapter.name} 目录未变化，跳过渲染和入库")
+                return True
+
+            # 写入新的版本暂存目录，校验通过后才切换 current，失败时旧目录原样在线（渐进模式下恢复上一期）
+            versions = self.versions(adapter)
+            version = new_version_id(download.sha256)
+            versions.create(version)
+            header = self.catalogue_header(adapter, pdf_url, download, version)
+            # 渐进发布会在整本完成前切换在线目录：先给发布前的目录行和 current 指针拍快照，中断时原样恢复
+            previous_version = versions.current()
+            snapshot = get_db_manager().snapshot_catalogue(adapter.name) if self.progressive(adapter) else None
+            built = None
+            try:
+                built = self.build(adapter, download.path, versions, version, header, started)
+            finally:
+                if built is None:
+                    self.abandon(adapter, versions, version, snapshot, previous_version)
+            if built is None:
+                return False
+            image_paths, page_entries, page_hashes, old_paths = built
+            # 整本已发布：之后的收尾（索引、清理）不受截止时间限制
+            with self._stats_lock:
+                self.deadlines.pop(adapter.name, None)
+
+            get_db_manager().save_page_hashes(page_hashes)
+            self.download_cache.mark_published(pdf_url, download.sha256)
+            if page_entries:
+                PageManifest(adapter.name).save(page_entries)
+
+            # 新版本生效后再清理旧文件、回收过期版本
+            self.clean_old_files(adapter, old_paths, image_paths)
+            versions.collect_garbage(get_db_manager())
+            reused, rebuilt = self.page_stats.get(adapter.name, (0, len(image_paths)))
+            deduplicated = self.dedupe_stats.get(adapter.name, 0)
+            logging.info(
+                f"✅ {adapter.name} 处理完成，共 {len(image_paths)} 页"
+                f"（复用 {reused} 页，重建 {rebuilt} 页，其中 {deduplicated} 页去重引用已有图片），"
+                f"首页可见耗时 {self.first_page_times.get(adapter.name, 0):.2f} s"
+            )
+            self.log_encoded_bytes(adapter.name)
+            return True
+
+        except Exception as e:
+            logging.error(f"处理 {adapter.name} 失败: {e}")
+            return False
+
+        finally:
+            with self._stats_lock:
+                self.deadlines.pop(adapter.name, None)
+            self.log_stage_times(adapter.name)
+
+    def run_all(self, stores=None):
+        """并发处理所有启用的商店，返回 StoreResult 列表"""
+        try:
+            return StoreOrchestrator(self.run_store, stores=enabled_stores(stores)).run()
+        finally:
+            self.finish()
+
+    def finish(self):
+        """一次运行结束：输出共享资源的统计（浏览器进程保持常驻供下次运行复用）"""
+        get_http_client().log_stats()
+        get_db_manager().log_stats()
+        self.log_encoded_bytes()
+
+    def log_encoded_bytes(self, store_name=None):
+        """预算编码前后的页面总字节数；不指定商店时汇总本次运行的所有商店"""
+        with self._stats_lock:
+            if store_name:
+                stats = [self.byte_stats.get(store_name, (0, 0))]
+            else:
+                stats = list(self.byte_stats.values())
+        before = sum(item[0] for item in stats)
+        after = sum(item[1] for item in stats)
+        if before:
+            logging.info(
+                f"{store_name or '本次运行'} 新渲染页面: 旧方式 {before / (1024 * 1024):.2f} MB -> "
+                f"预算编码 {after / (1024 * 1024):.2f} MB（节省 {(1 - after / before) * 100:.0f}%）"
+            )
+
+    def log_stage_times(self, store_name):
+        with self._stats_lock:
+            times = dict(self.stage_times.get(store_name, {}))
+        if times:
+            summary = ', '.join(f"{stage} {elapsed:.2f} s" for stage, elapsed in times.items())
+            logging.info(f"{store_name} 各阶段耗时: {summary}")
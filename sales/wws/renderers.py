@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+PDF渲染后端 - 统一的分段渲染接口：poppler（pdf2image 调起 pdftoppm 子进程）和
+pdfium（pypdfium2，进程内渲染）。两个后端输出相同的文件名、页码和像素尺寸，
+校准命令在样本目录上分别计时，把较快的后端保存到缓存中供 renderer='auto' 使用
+
+用法:
+    python renderers.py 样本目录.pdf              # 校准并保存较快的后端
+    python renderers.py 样本目录.pdf --pages 8    # 指定参与计时的页数
+"""
+
+import os
+import json
+import math
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+from collections import namedtuple
+from datetime import datetime
+from pdf2image import convert_from_path, pdfinfo_from_path
+from PIL import Image
+from config import SCRAPER_CONFIG, ENCODER_CONFIG
+from jpeg_encoder import encode_page, describe
+from download_cache import resolve_cache_dir
+
+try:
+    import pypdfium2 as pdfium  # 可选依赖，进程内渲染，没有子进程启动和图片管道开销
+except ImportError:
+    pdfium = None
+
+# 单页渲染结果: 页码、本地文件路径、数据库路径、文件大小，
+# 预算编码时另有按旧方式（固定 image_quality）编码的字节数（measure_baseline 关闭时为None）和编码参数摘要
+RenderedPage = namedtuple(
+    'RenderedPage', ['page_number', 'file_path', 'db_path', 'size', 'baseline_size', 'encoding'],
+    defaults=[None, None]
+)
+
+# 后端名 -> 渲染器类
+RENDERERS = {}
+
+
+class RenderSizeMismatch(ValueError):
+    """后端输出的页面尺寸与 pdftoppm 相差超过取整误差（1像素），该后端的结果不可用"""
+
+
+def register_renderer(name):
+    """类装饰器：把渲染后端注册到 RENDERERS"""
+    def decorator(cls):
+        cls.name = name
+        RENDERERS[name] = cls
+        return cls
+    return decorator
+
+
+def page_filename(date_str, page_number):
+    """单页图片文件名，如 20250605_page3.jpg"""
+    return f"{date_str}_page{page_number}.jpg"
+
+
+def pixel_size(width_pt, height_pt, rotation, dpi):
+    """页面在指定DPI下的像素尺寸，与pdftoppm默认一致（媒体框、向上取整、按旋转交换宽高）"""
+    if (rotation or 0) % 180:
+        width_pt, height_pt = height_pt, width_pt
+    return math.ceil(width_pt * dpi / 72), math.ceil(height_pt * dpi / 72)
+
+
+def jpeg_options():
+    """直接输出最终JPEG时使用的编码参数（poppler直出和pdfium共用）"""
+    return {
+        'quality': SCRAPER_CONFIG['image_quality'],
+        'progressive': SCRAPER_CONFIG['render_progressive'],
+        'optimize': True
+    }
+
+
+def budget_encoding():
+    """预算编码开启时，各后端先得到无损位图，只在 save_jpeg 中做一次有损编码"""
+    return ENCODER_CONFIG['enabled']
+
+
+def save_jpeg(image, page_number, output_dir, url_prefix, date_str, **options):
+    """把单页编码为JPEG写盘，返回 (RenderedPage, 编码耗时)；预算编码开启时忽略 options"""
+    filename = page_filename(date_str, page_number)
+    file_path = os.path.join(output_dir, filename)
+    db_path = f"{url_prefix}/{filename}"
+
+    started = time.perf_counter()
+    try:
+        if budget_encoding():
+            encoded = encode_page(image)
+            with open(file_path, 'wb') as f:
+                f.write(encoded.data)
+        else:
+            encoded = None
+            image.save(file_path, 'JPEG', **options)
+    finally:
+        image.close()
+    encode_time = time.perf_counter() - started
+
+    size = os.path.getsize(file_path)
+    if encoded:
+        page = RenderedPage(page_number, file_path, db_path, size, encoded.baseline_size, describe(encoded))
+    else:
+        page = RenderedPage(page_number, file_path, db_path, size)
+    return page, encode_time
+
+
+class PageRenderer:
+    """渲染后端基类：render_range 按 dpi（默认 render_dpi）把一段连续页写入 output_dir，
+    返回 [(RenderedPage, 每页渲染耗时, 编码耗时)]，按页码排序"""
+    name = None
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def render_range(self, pdf_path, first_page, last_page, output_dir, url_prefix, date_str, dpi=None):
+        raise NotImplementedError
+
+
+@register_renderer('poppler')
+class PopplerRenderer(PageRenderer):
+    """pdftoppm 子进程；mode 为 direct 时直接写最终JPEG，pil 时解码后由PIL重新编码"""
+
+    def __init__(self, mode=None):
+        self.mode = mode or SCRAPER_CONFIG['render_mode']
+
+    def render_range(self, pdf_path, first_page, last_page, output_dir, url_prefix, date_str, dpi=None):
+        dpi = dpi or SCRAPER_CONFIG['render_dpi']
+        if self.mode == 'direct':
+            return self._render_direct(pdf_path, first_page, last_page, output_dir, url_prefix, date_str, dpi)
+        return self._render_pil(pdf_path, first_page, last_page, output_dir, url_prefix, date_str, dpi)
+
+    def iter_pages(self, pdf_path, first_page, last_page, dpi=None, window=None):
+        """逐页生成 (页码, 图片, 渲染耗时)，同一时间最多只解码 window 页"""
+        dpi = dpi or SCRAPER_CONFIG['render_dpi']
+        window = max(1, window or SCRAPER_CONFIG['render_window'])
+
+        for batch_first in range(first_page, last_page + 1, window):
+            batch_last = min(batch_first + window - 1, last_page)
+
+            started = time.perf_counter()
+            images = convert_from_path(
+                pdf_path,
+                dpi=dpi,
+                fmt='ppm' if budget_encoding() else 'JPEG',  # 预算编码需要无损位图
+                first_page=batch_first,
+                last_page=batch_last
+            )
+            render_time = (time.perf_counter() - started) / max(len(images), 1)
+
+            page_number = batch_first
+            while images:
+                # 逐个弹出，交给调用方后本地不再持有引用
+                yield page_number, images.pop(0), render_time
+                page_number += 1
+
+    def _render_pil(self, pdf_path, first_page, last_page, output_dir, url_prefix, date_str, dpi):
+        """渲染为PIL图片后再编码写盘（poppler编码 -> 解码 -> PIL再编码）"""
+        quality = SCRAPER_CONFIG['image_quality']
+        results = []
+        for page_number, image, render_time in self.iter_pages(pdf_path, first_page, last_page, dpi=dpi):
+            page, encode_time = save_jpeg(image, page_number, output_dir, url_prefix, date_str, quality=quality)
+            results.append((page, render_time, encode_time))
+        return results
+
+    def _render_direct(self, pdf_path, first_page, last_page, output_dir, url_prefix, date_str, dpi):
+        """poppler按最终JPEG参数直接写入 output_dir，再改名为标准文件名；不解码、不在内存中持有位图
+
+        预算编码开启时poppler改为直接写无损PPM，逐页读回做一次预算编码后删除
+        """
+        prefix = f".render-{first_page}-"  # 各页段前缀不同，并行写同一目录不会冲突
+        budget = budget_encoding()
+        started = time.perf_counter()
+        paths = convert_from_path(
+            pdf_path,
+            dpi=dpi,
+            fmt='ppm' if budget else 'jpeg',
+            jpegopt=None if budget else jpeg_options(),
+            first_page=first_page,
+            last_page=last_page,
+            output_folder=output_dir,
+            output_file=prefix,
+            paths_only=True
+        )
+        render_time = (time.perf_counter() - started) / max(len(paths), 1)
+
+        results = []
+        for path in paths:
+            # pdftoppm 输出 {前缀}{序号}-{页码}.jpg / .ppm
+            page_number = int(os.path.splitext(os.path.basename(path))[0].rsplit('-', 1)[1])
+            if budget:
+                try:
+                    page, encode_time = save_jpeg(Image.open(path), page_number, output_dir, url_prefix, date_str)
+                finally:
+                    os.remove(path)
+                results.append((page, render_time, encode_time))
+                continue
+            filename = page_filename(date_str, page_number)
+            file_path = os.path.join(output_dir, filename)
+            os.replace(path, file_path)
+            page = RenderedPage(page_number, file_path, f"{url_prefix}/{filename}", os.path.getsize(file_path))
+            results.append((page, render_time, 0.0))
+        return results
+
+
+@register_renderer('pdfium')
+class PdfiumRenderer(PageRenderer):
+    """pypdfium2 进程内渲染；与 pdftoppm 一样渲染媒体框，只修正 1 像素的取整差，更大的差异抛出 RenderSizeMismatch"""
+
+    @classmethod
+    def available(cls):
+        return pdfium is not None
+
+    def render_range(self, pdf_path, first_page, last_page, output_dir, url_prefix, date_str, dpi=None):
+        dpi = dpi or SCRAPER_CONFIG['render_dpi']
+        options = jpeg_options()
+        results = []
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            for page_number in range(first_page, last_page + 1):
+                page = pdf[page_number - 1]
+                try:
+                    started = time.perf_counter()
+                    left, bottom, right, top = page.get_mediabox()
+                    # pdftoppm 默认渲染媒体框，pdfium 渲染裁剪框；带出血的印刷稿两者不同，先让 pdfium 也渲染媒体框
+                    page.set_cropbox(left, bottom, right, top)
+                    target = pixel_size(right - left, top - bottom, page.get_rotation(), dpi)
+                    image = page.render(scale=dpi / 72).to_pil().convert('RGB')
+                    if image.size != target:
+                        if max(abs(image.width - target[0]), abs(image.height - target[1])) > 1:
+                            image.close()
+                            raise RenderSizeMismatch(
+                                f"第{page_number}页 pdfium 输出 {image.size[0]}x{image.size[1]}，"
+                                f"pdftoppm 为 {target[0]}x{target[1]}"
+                            )
+                        # pdfium 按四舍五入取整，和 pdftoppm 可能差 1 像素
+                        resized = image.resize(target, Image.LANCZOS)
+                        image.close()
+                        image = resized
+                    render_time = time.perf_counter() - started
+                finally:
+                    page.close()
+                rendered, encode_time = save_jpeg(image, page_number, output_dir, url_prefix, date_str, **options)
+                results.append((rendered, render_time, encode_time))
+        finally:
+            pdf.close()
+        return results
+
+
+def calibration_path():
+    return os.path.join(resolve_cache_dir('renderer'), 'calibration.json')
+
+
+def load_calibration():
+    try:
+        with open(calibration_path(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def selected_renderer():
+    """SCRAPER_CONFIG['renderer'] 指定的后端；'auto' 时取校准结果，没有校准或不可用时用 poppler"""
+    name = SCRAPER_CONFIG['renderer']
+    if name == 'auto':
+        calibration = load_calibration() or {}
+        name = calibration.get('renderer', 'poppler')
+    renderer = RENDERERS.get(name)
+    if renderer is None or not renderer.available():
+        logging.warning(f"渲染后端 {name} 不可用，改用 poppler")
+        return 'poppler'
+    return name
+
+
+def get_renderer(name=None):
+    return RENDERERS[name or selected_renderer()]()
+
+
+def calibrate(pdf_path, pages=None):
+    """在样本PDF的前 pages 页上给每个可用后端计时，页码和尺寸与 poppler 一致的后端中选最快的并保存"""
+    pages = pages or SCRAPER_CONFIG['renderer_calibration_pages']
+    last_page = min(pages, int(pdfinfo_from_path(pdf_path)['Pages']))
+    timings = {}
+    outputs = {}
+    for name, renderer in RENDERERS.items():
+        if not renderer.available():
+            logging.info(f"跳过不可用的渲染后端: {name}")
+            continue
+        temp_dir = tempfile.mkdtemp(prefix=f"calibrate-{name}-")
+        try:
+            started = time.perf_counter()
+            results = renderer().render_range(pdf_path, 1, last_page, temp_dir, '', 'calibrate')
+            timings[name] = time.perf_counter() - started
+            output = []
+            for page, _, _ in results:
+                with Image.open(page.file_path) as image:
+                    output.append((page.page_number, os.path.basename(page.file_path), image.size))
+            outputs[name] = output
+            logging.info(f"{name}: {last_page} 页耗时 {timings[name]:.2f} s")
+        except Exception as e:
+            logging.warning(f"渲染后端 {name} 校准失败: {e}")
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    reference = outputs.get('poppler')
+    for name in list(timings):
+        if reference is not None and outputs[name] != reference:
+            logging.error(f"{name} 的页码/文件名/尺寸与 poppler 不一致，不参与选择")
+            del timings[name]
+    if not timings:
+        logging.error("没有可用的渲染后端")
+        return None
+
+    best = min(timings, key=timings.get)
+    calibration = {
+        'renderer': best,
+        'timings': timings,
+        'pages': last_page,
+        'sample': os.path.basename(pdf_path),
+        'calibrated_at': datetime.now().isoformat(timespec='seconds')
+    }
+    with open(calibration_path(), 'w', encoding='utf-8') as f:
+        json.dump(calibration, f, ensure_ascii=False, indent=2)
+    logging.info(f"已选择渲染后端: {best}（保存到 {calibration_path()}）")
+    return best
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='校准PDF渲染后端')
+    parser.add_argument('pdf', help='样本目录PDF')
+    parser.add_argument('--pages', type=int, default=None, help='参与计时的页数')
+    args = parser.parse_args()
+    calibrate(args.pdf, args.pages)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+选择器策略引擎 - 页面就绪只等待一次，之后每组候选选择器在一次脚本调用中同时尝试（零隐式等待），
+未命中只花一次脚本往返；调用方明确需要等待动态元素时才按超时轮询。
+按商店记录每组选择器中命中的策略，下次优先尝试
+"""
+
+import os
+import re
+import json
+import time
+import logging
+from config import BROWSER_CONFIG
+from download_cache import resolve_cache_dir
+
+# 兼容 jQuery 风格的 button:contains("Go") 写法（浏览器原生CSS不支持）
+CONTAINS_PATTERN = re.compile(r'^(.*?):contains\((["\'])(.*)\2\)$')
+
+FIND_FIRST_JS = """
+const candidates = arguments[0];
+for (let i = 0; i < candidates.length; i++) {
+    const [kind, query, text] = candidates[i];
+    let element = null;
+    try {
+        if (kind === 'xpath') {
+            element = document.evaluate(query, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        } else if (kind === 'text') {
+            element = Array.from(document.querySelectorAll(query)).find((e) => (e.textContent || '').includes(text)) || null;
+        } else {
+            element = document.querySelector(query);
+        }
+    } catch (e) {
+        element = null;  // 无效选择器直接跳过
+    }
+    if (element) return [i, element];
+}
+return null;
+"""
+
+READY_STATE_JS = "return document.readyState;"
+
+
+def parse_selector(selector):
+    """把候选选择器转换为 (类型, 查询, 文字)"""
+    if selector.startswith('/') or selector.startswith('./') or selector.startswith('('):
+        return ['xpath', selector, '']
+    match = CONTAINS_PATTERN.match(selector)
+    if match:
+        return ['text', match.group(1) or '*', match.group(3)]
+    return ['css', selector, '']
+
+
+class SelectorStrategyEngine:
+    def __init__(self, driver, store_name):
+        self.driver = driver
+        self.store_name = store_name
+        self.stats_file = os.path.join(resolve_cache_dir('selectors'), f"{store_name}.json")
+        self.wins = self._load_wins()
+
+    def _load_wins(self):
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _record_win(self, group, selector):
+        group_wins = self.wins.setdefault(group, {})
+        group_wins[selector] = group_wins.get(selector, 0) + 1
+        with open(self.stats_file, 'w', encoding='utf-8') as f:
+            json.dump(self.wins, f, ensure_ascii=False, indent=2)
+
+    def _ordered(self, group, candidates):
+        """历史上命中次数多的选择器排在前面，同分保持原顺序"""
+        group_wins = self.wins.get(group, {})
+        return sorted(candidates, key=lambda selector: -group_wins.get(selector, 0))
+
+    def wait_until_ready(self, timeout=None):
+        """等待页面 document.readyState 为 complete（每个页面调用一次），超时返回False"""
+        timeout = BROWSER_CONFIG['page_ready_timeout'] if timeout is None else timeout
+        started = time.perf_counter()
+        while self.driver.execute_script(READY_STATE_JS) != 'complete':
+            if time.perf_counter() - started >= timeout:
+                logging.info(f"{self.store_name} 页面在 {timeout} 秒内未就绪，按当前DOM查找")
+                return False
+            time.sleep(BROWSER_CONFIG['selector_poll_interval'])
+        return True
+
+    def find(self, group, candidates, timeout=0):
+        """返回第一个命中的元素，全部未命中返回None
+
+        默认只做一次脚本调用（页面应已 wait_until_ready）；timeout > 0 时在该时间内轮询，用于等待动态出现的元素
+        """
+        ordered = self._ordered(group, candidates)
+        parsed = [parse_selector(selector) for selector in ordered]
+
+        started = time.perf_counter()
+        deadline = started + timeout
+        while True:
+            found = self.driver.execute_script(FIND_FIRST_JS, parsed)
+            if found:
+                index, element = found
+                selector = ordered[index]
+                elapsed = (time.perf_counter() - started) * 1000
+                logging.info(f"{self.store_name} [{group}] 命中策略: {selector} ({elapsed:.0f} ms)")
+                self._record_win(group, selector)
+                return element
+            if time.perf_counter() >= deadline:
+                break
+            time.sleep(BROWSER_CONFIG['selector_poll_interval'])
+
+        elapsed = (time.perf_counter() - started) * 1000
+        logging.info(f"{self.store_name} [{group}] {len(candidates)} 个候选均未命中 ({elapsed:.0f} ms)")
+        return None
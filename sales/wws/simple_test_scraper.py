@@ -3,10 +3,9 @@
 简化版测试爬虫 - 直接使用测试图片URL
 """
 
-import mysql.connector
 import logging
 from datetime import date
-from config import DB_CONFIG
+from database import get_db_manager
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,17 +13,12 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 def test_database_connection():
     """测试数据库连接"""
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        if connection.is_connected():
+        with get_db_manager().cursor() as cursor:
             logging.info("✅ 数据库连接成功")
-            cursor = connection.cursor()
             cursor.execute("SELECT VERSION()")
             version = cursor.fetchone()
             logging.info(f"MySQL版本: {version[0]}")
-            cursor.close()
-            connection.close()
-            return True
-        return False
+        return True
     except Exception as e:
         logging.error(f"❌ 数据库连接失败: {e}")
         return False
@@ -32,14 +26,10 @@ def test_database_connection():
 def clear_old_data():
     """清除旧数据"""
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
-        cursor.execute("DELETE FROM catalogue_images")
-        connection.commit()
-        deleted_count = cursor.rowcount
+        with get_db_manager().cursor(commit=True) as cursor:
+            cursor.execute("DELETE FROM catalogue_images")
+            deleted_count = cursor.rowcount
         logging.info(f"🗑️ 删除了 {deleted_count} 条旧记录")
-        cursor.close()
-        connection.close()
         return True
     except Exception as e:
         logging.error(f"❌ 清除数据失败: {e}")
@@ -59,22 +49,20 @@ def insert_test_data():
     ]
     
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
-        
         today = date.today()
+        query = """
+        INSERT INTO catalogue_images (store_name, page_number, image_data, week_date)
+        VALUES (%s, %s, %s, %s)
+        """
         
-        for store_name, page_number, image_url in test_images:
-            query = """
-            INSERT INTO catalogue_images (store_name, page_number, image_data, week_date)
-            VALUES (%s, %s, %s, %s)
-            """
-            cursor.execute(query, (store_name, page_number, image_url, today))
-            logging.info(f"✅ 插入成功: {store_name} 第{page_number}页")
+        with get_db_manager().cursor(commit=True) as cursor:
+            cursor.executemany(
+                query,
+                [(store_name, page_number, image_url, today) for store_name, page_number, image_url in test_images]
+            )
         
-        connection.commit()
-        cursor.close()
-        connection.close()
+        for store_name, page_number, _ in test_images:
+            logging.info(f"✅ 插入成功: {store_name} 第{page_number}页")
         
         logging.info(f"🎉 成功插入 {len(test_images)} 张测试图片")
         return True
@@ -86,19 +74,14 @@ def insert_test_data():
 def verify_data():
     """验证数据"""
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        cursor = connection.cursor()
-        
-        cursor.execute("SELECT store_name, page_number, LEFT(image_data, 50) FROM catalogue_images ORDER BY store_name, page_number")
-        results = cursor.fetchall()
+        with get_db_manager().cursor() as cursor:
+            cursor.execute("SELECT store_name, page_number, LEFT(image_data, 50) FROM catalogue_images ORDER BY store_name, page_number")
+            results = cursor.fetchall()
         
         logging.info("📊 数据库中的图片记录:")
         for store, page, url_preview in results:
             logging.info(f"  {store} 第{page}页: {url_preview}...")
         
-        cursor.close()
-        connection.close()
-        
         return len(results) > 0
         
     except Exception as e:
@@ -130,6 +113,8 @@ def main():
         logging.info("🎯 现在可以在小程序中测试目录图片功能了")
     else:
         logging.error("❌ 数据验证失败")
+    
+    get_db_manager().log_stats()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+商店适配器 - 每家商店只负责找到本周目录PDF的地址，
+下载、渲染、入库和发布统一由 pipeline.CataloguePipeline 完成
+"""
+
+import time
+import logging
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from dom_extract import extract_anchors, find_pdf_links
+from selector_engine import SelectorStrategyEngine
+from config import STORES
+
+# 商店名 -> 适配器类；没有注册的商店使用只走HTTP发现的 StoreAdapter
+ADAPTERS = {}
+
+
+def register_adapter(name):
+    """类装饰器：把适配器注册到 ADAPTERS"""
+    def decorator(cls):
+        ADAPTERS[name] = cls
+        return cls
+    return decorator
+
+
+class StoreAdapter:
+    """默认适配器：只用HTTP抓取 catalogue_url 发现PDF，没有浏览器回退"""
+    browser_flow = False
+
+    def __init__(self, store):
+        self.store = store
+        self.name = store['name']
+        self.catalogue_url = store['catalogue_url']
+        self.preferred_text = store.get('preferred_text')
+        self.region = store.get('region')
+        self.dpi_overrides = store.get('dpi_overrides') or {}
+
+    def wait_for_page(self, driver, url, tag='body'):
+        driver.get(url)
+        WebDriverWait(driver, 20).until(
+            EC.presence_of_element_located((By.TAG_NAME, tag))
+        )
+
+    def browser_discover(self, driver):
+        """浏览器回退路径，在已打开的标签页中返回PDF地址"""
+        return None
+
+
+@register_adapter('coles')
+class ColesAdapter(StoreAdapter):
+    browser_flow = True
+
+    def browser_discover(self, driver):
+        """爬取Coles目录 - 优先 "This week's catalogue" 区域内的PDF"""
+        try:
+            logging.info("开始爬取Coles目录...")
+            self.wait_for_page(driver, self.catalogue_url, tag='a')
+
+            # 一次脚本调用取回所有链接，找不到指定区域时退回页面上第一个PDF
+            pdf_links = find_pdf_links(driver, preferred_text=self.preferred_text)
+
+            if pdf_links:
+                logging.info(f"找到Coles主目录PDF: {pdf_links[0].url}")
+                return pdf_links[0].url
+
+            logging.error("未找到Coles PDF链接")
+            return None
+
+        except Exception as e:
+            logging.error(f"爬取Coles目录失败: {e}")
+            return None
+
+
+@register_adapter('woolworths')
+class WoolworthsAdapter(StoreAdapter):
+    browser_flow = True
+    postcode = "2000"  # 悉尼CBD邮编
+
+    def set_postcode(self, driver):
+        """尝试设置邮编（如果需要的话）：页面就绪后每组候选选择器只在一次脚本调用中同时尝试，没有邮编框时几乎不耗时"""
+        try:
+            selectors = SelectorStrategyEngine(driver, self.name)
+            selectors.wait_until_ready()
+            postcode_input = selectors.find('postcode_input', [
+                'input[placeholder*="postcode"]',
+                'input[placeholder*="Postcode"]',
+                'input[name*="postcode"]',
+                'input[id*="postcode"]'
+            ])
+            if not postcode_input:
+                return
+
+            logging.info("找到邮编输入框，设置默认邮编...")
+            postcode_input.clear()
+            postcode_input.send_keys(self.postcode)
+
+            # 查找提交按钮
+            submit_btn = selectors.find('postcode_submit', [
+                'button[type="submit"]',
+                'button:contains("Submit")',
+                'button:contains("Go")',
+                '.submit-button'
+            ])
+
+            if submit_btn:
+                submit_btn.click()
+                logging.info("已提交邮编")
+                time.sleep(3)  # 等待页面更新
+
+        except Exception as e:
+            logging.info(f"设置邮编失败，继续查找PDF: {e}")
+
+    def browser_discover(self, driver):
+        """爬取Woolworths目录 - 先设置邮编再找PDF"""
+        try:
+            logging.info("开始爬取Woolworths目录...")
+            self.wait_for_page(driver, self.catalogue_url)
+            self.set_postcode(driver)
+
+            # 一次脚本调用取回所有链接，在Python中筛选
+            anchors = extract_anchors(driver)
+            pdf_links = find_pdf_links(driver, preferred_text=self.preferred_text, anchors=anchors)
+
+            if pdf_links:
+                logging.info(f"找到Woolworths PDF: {pdf_links[0].url}")
+                return pdf_links[0].url
+
+            # 如果还是没找到，访问第一个目录相关链接再找一次
+            logging.info("尝试查找其他格式的目录链接...")
+            catalogue_links = [
+                anchor.href for anchor in anchors
+                if 'catalogue' in anchor.href.lower() or 'catalog' in anchor.href.lower()
+            ]
+
+            if catalogue_links:
+                logging.info(f"找到 {len(catalogue_links)} 个目录相关链接")
+                driver.get(catalogue_links[0])
+                time.sleep(3)
+
+                pdf_links = find_pdf_links(driver)
+                if pdf_links:
+                    logging.info(f"在子页面找到Woolworths PDF: {pdf_links[0].url}")
+                    return pdf_links[0].url
+
+            logging.error("未找到Woolworths PDF链接")
+            return None
+
+        except Exception as e:
+            logging.error(f"爬取Woolworths目录失败: {e}")
+            return None
+
+
+def store_config(name):
+    """按商店名取 STORES 中的配置"""
+    for store in STORES:
+        if store['name'] == name:
+            return store
+    raise KeyError(f"未配置的商店: {name}")
+
+
+def get_adapter(store):
+    """store 可以是商店名或 STORES 中的一项"""
+    if isinstance(store, str):
+        store = store_config(store)
+    return ADAPTERS.get(store['name'], StoreAdapter)(store)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+目录PDF发现的离线测试 - 使用 fixtures/ 中保存的页面HTML，不访问网络、不启动浏览器
+
+运行: cd sales/wws && python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalogue_discovery import CatalogueDiscovery, extract_pdf_links, rank_pdf_links  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+COLES_URL = 'https://www.coles.com.au/catalogues'
+WOOLWORTHS_URL = 'https://www.woolworths.com.au/shop/catalogue'
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+class FakeResponse:
+    def __init__(self, text, status_code=200):
+        self.text = text
+        self.status_code = status_code
+
+
+class FakeHttpClient:
+    """按URL返回保存的页面，记录请求次数"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.requests = []
+
+    def get(self, url, **kwargs):
+        self.requests.append(url)
+        if url not in self.pages:
+            return FakeResponse('', status_code=404)
+        return FakeResponse(load_fixture(self.pages[url]))
+
+
+class ColesAnchorPageTest(unittest.TestCase):
+    """Coles: PDF链接在页面的<a>中，按 "This week's catalogue" 所在区域选择"""
+
+    def setUp(self):
+        self.links = extract_pdf_links(load_fixture('coles_catalogues.html'), COLES_URL)
+
+    def test_extracts_anchor_links_in_document_order(self):
+        self.assertEqual([link.url for link in self.links], [
+            'https://www.coles.com.au/content/dam/coles/about/terms-and-conditions.pdf',
+            'https://www.coles.com.au/content/dam/coles/catalogues/nsw-next-week.pdf',
+            'https://www.coles.com.au/content/dam/coles/catalogues/nsw-this-week.pdf',
+            'https://www.liquorland.com.au/catalogue/liquorland-nsw.pdf?v=2',
+        ])
+        self.assertTrue(all(link.source == 'anchor' for link in self.links))
+
+    def test_relative_links_resolved_and_duplicates_removed(self):
+        urls = [link.url for link in self.links]
+        self.assertEqual(len(urls), len(set(urls)))
+        self.assertTrue(all(url.startswith('https://') for url in urls))
+
+    def test_anchor_context_collected(self):
+        this_week = next(link for link in self.links if link.url.endswith('nsw-this-week.pdf'))
+        self.assertEqual(this_week.text, 'Download PDF')
+        self.assertTrue(any("This week's catalogue" in text for text in this_week.context))
+
+    def test_preferred_text_ranks_this_week_first(self):
+        ranked = rank_pdf_links(self.links, "This week's catalogue")
+        self.assertEqual(ranked[0].url, 'https://www.coles.com.au/content/dam/coles/catalogues/nsw-this-week.pdf')
+
+    def test_without_preferred_text_download_links_first(self):
+        ranked = rank_pdf_links(self.links)
+        self.assertEqual(ranked[0].url, 'https://www.coles.com.au/content/dam/coles/catalogues/nsw-next-week.pdf')
+        self.assertEqual(ranked[1].url, 'https://www.coles.com.au/content/dam/coles/catalogues/nsw-this-week.pdf')
+
+
+class WoolworthsScriptPageTest(unittest.TestCase):
+    """Woolworths: 页面由脚本渲染，PDF地址只在内嵌的JSON状态里（含 \\/ 和 \\u002F 转义）"""
+
+    def setUp(self):
+        self.links = extract_pdf_links(load_fixture('woolworths_catalogue.html'), WOOLWORTHS_URL)
+
+    def test_extracts_unescaped_script_links(self):
+        self.assertEqual([link.url for link in self.links], [
+            'https://www.woolworths.com.au/content/dam/wowproductimages/catalogue/ww-nsw-metro.pdf',
+            'https://www.woolworths.com.au/content/dam/wowproductimages/catalogue/ww-nsw-preview.pdf?region=NSW',
+        ])
+        self.assertTrue(all(link.source == 'script' for link in self.links))
+        self.assertTrue(all(link.text == '' and link.context == () for link in self.links))
+
+    def test_ranking_keeps_document_order(self):
+        ranked = rank_pdf_links(self.links)
+        self.assertEqual(ranked[0].url, 'https://www.woolworths.com.au/content/dam/wowproductimages/catalogue/ww-nsw-metro.pdf')
+
+    def test_anchor_outranks_script_link(self):
+        html = load_fixture('woolworths_catalogue.html').replace(
+            '<noscript>',
+            '<a href="/content/dam/wowproductimages/catalogue/ww-nsw-anchor.pdf">Catalogue</a><noscript>'
+        )
+        ranked = rank_pdf_links(extract_pdf_links(html, WOOLWORTHS_URL))
+        self.assertEqual(ranked[0].source, 'anchor')
+        self.assertEqual(ranked[0].url, 'https://www.woolworths.com.au/content/dam/wowproductimages/catalogue/ww-nsw-anchor.pdf')
+
+
+class CatalogueDiscoveryTest(unittest.TestCase):
+    """HTTP快速路径命中时不调用浏览器回退，找不到PDF时才回退"""
+
+    def setUp(self):
+        self.fallback_calls = []
+
+    def fallback(self):
+        self.fallback_calls.append(True)
+        return 'https://example.com/from-browser.pdf'
+
+    def test_http_hit_skips_browser(self):
+        http = FakeHttpClient({COLES_URL: 'coles_catalogues.html'})
+        pdf_url = CatalogueDiscovery(http).discover(
+            'coles', COLES_URL, browser_fallback=self.fallback, preferred_text="This week's catalogue"
+        )
+        self.assertEqual(pdf_url, 'https://www.coles.com.au/content/dam/coles/catalogues/nsw-this-week.pdf')
+        self.assertEqual(http.requests, [COLES_URL])
+        self.assertEqual(self.fallback_calls, [])
+
+    def test_script_page_hit_skips_browser(self):
+        http = FakeHttpClient({WOOLWORTHS_URL: 'woolworths_catalogue.html'})
+        pdf_url = CatalogueDiscovery(http).discover('woolworths', WOOLWORTHS_URL, browser_fallback=self.fallback)
+        self.assertEqual(pdf_url, 'https://www.woolworths.com.au/content/dam/wowproductimages/catalogue/ww-nsw-metro.pdf')
+        self.assertEqual(self.fallback_calls, [])
+
+    def test_page_without_pdf_falls_back_to_browser(self):
+        http = FakeHttpClient({WOOLWORTHS_URL: 'no_pdf.html'})
+        pdf_url = CatalogueDiscovery(http).discover('woolworths', WOOLWORTHS_URL, browser_fallback=self.fallback)
+        self.assertEqual(pdf_url, 'https://example.com/from-browser.pdf')
+        self.assertEqual(self.fallback_calls, [True])
+
+    def test_http_error_without_fallback_returns_none(self):
+        http = FakeHttpClient({})
+        self.assertIsNone(CatalogueDiscovery(http).discover('coles', COLES_URL))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+渐进发布的目录头测试 - 渲染、去重、校验等阶段用桩替换，发布时把目录头写入记录SQL参数的假游标，不连接数据库
+
+运行: cd sales/wws && python -m unittest discover -s tests
+"""
+
+import os
+import sys
+import threading
+import unittest
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import CatalogueHeader, record_catalogue  # noqa: E402
+from pipeline import CataloguePipeline  # noqa: E402
+
+
+class FakeCursor:
+    """记录执行的SQL和参数"""
+
+    def __init__(self):
+        self.statements = []
+        self.lastrowid = 1
+
+    def execute(self, query, params=None):
+        self.statements.append((' '.join(query.split()), params))
+
+    def executemany(self, query, rows):
+        self.statements.append((' '.join(query.split()), list(rows)))
+
+    def params(self, prefix):
+        return [params for query, params in self.statements if query.startswith(prefix)]
+
+
+class FakeAdapter:
+    name = 'coles'
+    region = 'nsw'
+
+
+class FakeVersions:
+    def __init__(self):
+        self.flipped = []
+
+    def version_dir(self, version):
+        return f"/tmp/coles/versions/{version}"
+
+    def version_url(self, version):
+        return f"/catalogue_images/coles/versions/{version}"
+
+    def flip(self, version):
+        self.flipped.append(version)
+
+
+class ProgressivePublishTest(unittest.TestCase):
+    """PDF共5页、每批2页：第一批上线后目录头记录的是整本页数而不是已上线页数"""
+
+    TOTAL_PAGES = 5
+
+    def setUp(self):
+        self.cursors = []
+        pipeline = CataloguePipeline.__new__(CataloguePipeline)
+        pipeline.stage_times = {}
+        pipeline.page_stats = {}
+        pipeline.first_page_times = {}
+        pipeline.deadlines = {}
+        pipeline._stats_lock = threading.Lock()
+        pipeline.plan = lambda adapter, pdf_path: (None, None, {}, list(range(1, self.TOTAL_PAGES + 1)))
+        pipeline.batches = lambda adapter, changed: [changed[i:i + 2] for i in range(0, len(changed), 2)]
+        pipeline.render = self.render
+        pipeline.dedupe = lambda adapter, image_paths, entries, rendered, seen=None: (image_paths, [])
+        pipeline.derive = lambda adapter, image_paths: None
+        pipeline.tile = lambda adapter, pdf_path, image_paths: None
+        pipeline.validate = lambda adapter, versions, image_paths, total_pages: True
+        pipeline.include_pages = lambda adapter, versions, version, image_paths, date_str: True
+        pipeline.publish = self.publish
+        self.pipeline = pipeline
+        self.header = CatalogueHeader(
+            'coles', 'nsw', 'v1', date(2026, 10, 17), date(2026, 10, 15), date(2026, 10, 21),
+            'https://example.com/coles.pdf', 'abc'
+        )
+
+    @staticmethod
+    def render(adapter, pdf_path, output_dir, url_prefix, pages, dpi_plan=None, date_str=None):
+        return [(page, f"{output_dir}/page_{page}.jpg", f"{url_prefix}/page_{page}.jpg") for page in pages]
+
+    def publish(self, adapter, image_paths, header=None):
+        cursor = FakeCursor()
+        record_catalogue(cursor, header, image_paths)
+        self.cursors.append(cursor)
+        return [] if len(self.cursors) == 1 else None  # 第二批发布失败，停在第一批
+
+    def test_first_partial_batch_stores_pdf_page_total(self):
+        built = self.pipeline.build(FakeAdapter(), 'coles.pdf', FakeVersions(), 'v1', self.header, 0.0)
+        self.assertIsNone(built)
+
+        first = self.cursors[0]
+        [catalogue] = first.params('INSERT INTO catalogues')
+        stored = dict(zip(CatalogueHeader._fields, catalogue))
+        self.assertEqual(stored['page_count'], self.TOTAL_PAGES)
+        self.assertFalse(stored['is_complete'])
+        [pages] = first.params('INSERT INTO catalogue_pages')
+        self.assertEqual([row[3] for row in pages], [1, 2])
+
+    def test_header_without_total_stores_written_pages(self):
+        cursor = FakeCursor()
+        record_catalogue(cursor, self.header, [(1, '/a.jpg'), (2, '/b.jpg')])
+        [catalogue] = cursor.params('INSERT INTO catalogues')
+        self.assertEqual(dict(zip(CatalogueHeader._fields, catalogue))['page_count'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
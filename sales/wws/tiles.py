@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+深度缩放瓦片 - 以较高DPI把每页渲染成DZI瓦片金字塔（.dzi 描述文件 + {名称}_files/{层}/{列}_{行}.jpg），
+客户端放大时只下载可见区域的瓦片。大图层用 pdftoppm 按瓦片行分带裁剪渲染，内存只占一带
+"""
+
+import io
+import os
+import math
+import time
+import shutil
+import logging
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+from PyPDF2 import PdfReader
+from config import SCRAPER_CONFIG, TILE_CONFIG
+from derivatives import Variant
+from renderers import pixel_size
+
+DZI_TEMPLATE = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" TileSize="{tile_size}" Overlap="0" Format="jpg">\n'
+    '  <Size Width="{width}" Height="{height}"/>\n'
+    '</Image>\n'
+)
+
+
+def tile_paths(source_path):
+    """一页瓦片输出的 .dzi 文件和瓦片目录（与页面图片同名）"""
+    base = os.path.splitext(source_path)[0]
+    return f"{base}.dzi", f"{base}_files"
+
+
+def page_pixel_size(pdf_path, page_number, dpi):
+    """按媒体框和旋转计算页面在指定DPI下的像素尺寸（与pdftoppm默认一致）"""
+    page = PdfReader(pdf_path).pages[page_number - 1]
+    return pixel_size(float(page.mediabox.width), float(page.mediabox.height), page.rotation, dpi)
+
+
+def dzi_levels(width, height):
+    """DZI各层尺寸：最高层为原始尺寸，每降一层长宽减半，第0层为1x1"""
+    max_level = math.ceil(math.log2(max(width, height, 1)))
+    return [
+        (level, math.ceil(width / 2 ** (max_level - level)), math.ceil(height / 2 ** (max_level - level)))
+        for level in range(max_level + 1)
+    ]
+
+
+def render_region(pdf_path, page_number, scale_size, region):
+    """用pdftoppm把页面缩放到 scale_size 后只渲染 region=(x, y, w, h) 这一块"""
+    x, y, w, h = region
+    command = [
+        'pdftoppm', '-f', str(page_number), '-l', str(page_number),
+        '-scale-to-x', str(scale_size[0]), '-scale-to-y', str(scale_size[1]),
+        '-x', str(x), '-y', str(y), '-W', str(w), '-H', str(h),
+        '-singlefile', pdf_path
+    ]
+    output = subprocess.run(command, capture_output=True, check=True, timeout=SCRAPER_CONFIG['timeout']).stdout
+    return Image.open(io.BytesIO(output))
+
+
+def _save_tiles(image, level_dir, row, tile_size, quality):
+    """把一带图片切成一行瓦片写盘，返回写入字节数"""
+    written = 0
+    for col in range(math.ceil(image.width / tile_size)):
+        box = (col * tile_size, 0, min((col + 1) * tile_size, image.width), image.height)
+        tile_path = os.path.join(level_dir, f"{col}_{row}.jpg")
+        image.crop(box).save(tile_path, 'JPEG', quality=quality)
+        written += os.path.getsize(tile_path)
+    return written
+
+
+def build_page_tiles(pdf_path, page_number, source_path, image_path):
+    """生成一页的瓦片金字塔，返回记录到派生图表的 Variant"""
+    tile_size = TILE_CONFIG['tile_size']
+    quality = TILE_CONFIG['quality']
+    width, height = page_pixel_size(pdf_path, page_number, TILE_CONFIG['dpi'])
+    dzi_path, files_dir = tile_paths(source_path)
+    temp_dir = f"{files_dir}.tmp"
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+    written = 0
+    small_levels = []
+    for level, level_w, level_h in dzi_levels(width, height):
+        if max(level_w, level_h) <= TILE_CONFIG['direct_level_limit']:
+            small_levels.append((level, level_w, level_h))
+            continue
+        # 大图层逐行渲染：每次只渲染一行瓦片高的横带
+        level_dir = os.path.join(temp_dir, str(level))
+        os.makedirs(level_dir)
+        for row in range(math.ceil(level_h / tile_size)):
+            band_h = min(tile_size, level_h - row * tile_size)
+            band = render_region(pdf_path, page_number, (level_w, level_h), (0, row * tile_size, level_w, band_h))
+            with band:
+                written += _save_tiles(band.convert('RGB'), level_dir, row, tile_size, quality)
+
+    # 小图层：渲染其中最大的一层，其余由它缩小得到
+    if small_levels:
+        _, base_w, base_h = small_levels[-1]
+        with render_region(pdf_path, page_number, (base_w, base_h), (0, 0, base_w, base_h)) as base:
+            base = base.convert('RGB')
+            for level, level_w, level_h in small_levels:
+                level_image = base if (level_w, level_h) == base.size else base.resize((level_w, level_h), Image.LANCZOS)
+                level_dir = os.path.join(temp_dir, str(level))
+                os.makedirs(level_dir)
+                for row in range(math.ceil(level_h / tile_size)):
+                    band = level_image.crop((0, row * tile_size, level_w, min((row + 1) * tile_size, level_h)))
+                    written += _save_tiles(band, level_dir, row, tile_size, quality)
+
+    shutil.rmtree(files_dir, ignore_errors=True)
+    os.replace(temp_dir, files_dir)
+    with open(dzi_path, 'w', encoding='utf-8') as f:
+        f.write(DZI_TEMPLATE.format(tile_size=tile_size, width=width, height=height))
+
+    dzi_url = f"{image_path.rsplit('/', 1)[0]}/{os.path.basename(dzi_path)}"
+    return Variant(image_path, 'tiles', 'dzi', width, height, written, dzi_path, dzi_url)
+
+
+def generate_tiles(pdf_path, pages, label=''):
+    """pages: [(页码, 本地原图路径, 数据库路径)]，按 render_workers 并行，返回 Variant 列表"""
+    if not pages:
+        return []
+
+    started = time.perf_counter()
+    workers = SCRAPER_CONFIG['render_workers']
+    if workers > 1 and len(pages) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pages))) as executor:
+            futures = [executor.submit(build_page_tiles, pdf_path, *page) for page in pages]
+            variants = [future.result() for future in futures]
+    else:
+        variants = [build_page_tiles(pdf_path, *page) for page in pages]
+
+    total_bytes = sum(variant.size for variant in variants)
+    logging.info(
+        f"{label}瓦片生成完成: {len(variants)} 页，{TILE_CONFIG['dpi']} DPI，"
+        f"共 {total_bytes / (1024 * 1024):.1f} MB，耗时 {time.perf_counter() - started:.2f} s"
+    )
+    return variants
@@ -0,0 +1,15 @@
+-- CreateTable
+CREATE TABLE "catalogue_image_variants" (
+    "id" INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    "image_path" TEXT NOT NULL,
+    "variant" TEXT NOT NULL,
+    "format" TEXT NOT NULL,
+    "width" INTEGER NOT NULL,
+    "height" INTEGER NOT NULL,
+    "bytes" INTEGER NOT NULL,
+    "variant_path" TEXT NOT NULL,
+    "created_at" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "catalogue_image_variants_image_path_variant_format_key" ON "catalogue_image_variants"("image_path", "variant", "format");
@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "catalogue_images" ADD COLUMN "version" TEXT;
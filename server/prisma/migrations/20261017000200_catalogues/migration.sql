@@ -0,0 +1,23 @@
+-- CreateTable
+CREATE TABLE "catalogues" (
+    "id" INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    "store_name" TEXT NOT NULL,
+    "region" TEXT,
+    "version" TEXT NOT NULL,
+    "week_date" DATETIME NOT NULL,
+    "valid_from" DATETIME NOT NULL,
+    "valid_to" DATETIME NOT NULL,
+    "source_url" TEXT,
+    "sha256" TEXT,
+    "page_count" INTEGER NOT NULL,
+    "is_complete" BOOLEAN NOT NULL DEFAULT true,
+    "first_page_seconds" REAL,
+    "is_current" BOOLEAN NOT NULL DEFAULT false,
+    "created_at" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "catalogues_store_name_version_key" ON "catalogues"("store_name", "version");
+
+-- CreateIndex
+CREATE INDEX "catalogues_store_name_is_current_idx" ON "catalogues"("store_name", "is_current");
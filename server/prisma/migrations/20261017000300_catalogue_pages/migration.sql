@@ -0,0 +1,21 @@
+-- CreateTable
+CREATE TABLE "catalogue_pages" (
+    "id" INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+    "catalogue_id" INTEGER NOT NULL,
+    "store_name" TEXT NOT NULL,
+    "version" TEXT NOT NULL,
+    "page_number" INTEGER NOT NULL,
+    "image_path" TEXT NOT NULL
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "catalogue_pages_store_name_version_page_number_key" ON "catalogue_pages"("store_name", "version", "page_number");
+
+-- CreateIndex
+CREATE INDEX "catalogue_pages_catalogue_id_page_number_idx" ON "catalogue_pages"("catalogue_id", "page_number");
+
+-- CreateIndex
+CREATE INDEX "catalogue_pages_image_path_idx" ON "catalogue_pages"("image_path");
+
+-- CreateIndex
+CREATE INDEX "catalogues_store_name_valid_from_valid_to_idx" ON "catalogues"("store_name", "valid_from", "valid_to");
@@ -25,6 +25,7 @@ import { WebSocket, WebSocketServer } from "ws";
 import { WebSocketRouter } from "./routes/websocketRouter";
 import { WebSocketController } from "./controllers/websocketController";
 import { WebSocketService } from "./services/websocketService";
+import { currentCatalogueDir } from "./utils/catalogueVersions";
 
 const app = express();
 const server = createServer(app);
@@ -145,7 +146,7 @@ app.use("/api/conversations", conversationRoutes);
 app.use("/api", indexRoutes);
 
 // 添加 catalogue 路由
-app.get("/api/catalogue/:store", (req: Request, res: Response) => {
+app.get("/api/catalogue/:store", async (req: Request, res: Response) => {
   const { store } = req.params;
   const fs = require("fs");
   const path = require("path");
@@ -153,26 +154,87 @@ app.get("/api/catalogue/:store", (req: Request, res: Response) => {
   const storeDir = path.join(IMAGES_PATH, store);
   const PORT = process.env.PORT || 3000;
   const baseUrl = process.env.BASE_URL || `http://localhost:${PORT}`;
+  // 只有站内相对路径才加 baseUrl，已经是 https:// 地址或 data:image 的旧数据原样返回
+  const withBase = (value: string) => (value.startsWith("/") ? `${baseUrl}${value}` : value);
 
   try {
+    const { PrismaClient } = require("@prisma/client");
+    const prisma = new PrismaClient();
+
+    // 爬虫分批发布：数据库里只有已提交批次的页面，目录头标记是否已全部发布
+    const [rows, catalogue] = await Promise.all([
+      prisma.catalogue_images.findMany({
+        where: { store_name: store },
+        orderBy: { page_number: "asc" },
+        select: { image_data: true },
+      }),
+      prisma.catalogues.findFirst({
+        where: { store_name: store, is_current: true },
+        select: { is_complete: true, page_count: true },
+      }),
+    ]);
+
+    if (rows.length > 0) {
+      // 每页的派生图（缩略图/移动端/完整图），按页面地址分组，客户端按显示宽度取最小的合适版本
+      const variantRows = await prisma.catalogue_image_variants.findMany({
+        where: { image_path: { in: rows.map((row: any) => row.image_data) } },
+        orderBy: [{ image_path: "asc" }, { width: "asc" }, { bytes: "asc" }],
+      });
+      await prisma.$disconnect();
+
+      const variants: Record<string, any[]> = {};
+      for (const row of variantRows) {
+        const pageUrl = withBase(row.image_path);
+        (variants[pageUrl] = variants[pageUrl] || []).push({
+          variant: row.variant,
+          format: row.format,
+          width: row.width,
+          height: row.height,
+          bytes: row.bytes,
+          url: withBase(row.variant_path),
+        });
+      }
+
+      return res.json({
+        code: 0,
+        message: "获取成功",
+        data: rows.map((row: any) => withBase(row.image_data)),
+        variants,
+        complete: catalogue ? catalogue.is_complete : true,
+        total: catalogue ? catalogue.page_count : rows.length,
+        published: rows.length,
+      });
+    }
+    await prisma.$disconnect();
+
     if (!fs.existsSync(storeDir)) {
       return res.json({
         code: 0,
         message: "获取成功",
         data: [],
+        complete: true,
       });
     }
 
+    // 数据库没有记录时，列出当前发布版本中的页面图片（不含派生图）
+    const current = currentCatalogueDir(storeDir, `/catalogue_images/${store}`);
     const files = fs
-      .readdirSync(storeDir)
-      .filter((f: string) => f.endsWith(".jpg") || f.endsWith(".jpeg"))
-      .sort()
-      .map((file: string) => `${baseUrl}/catalogue_images/${store}/${file}`);
+      .readdirSync(current.dir)
+      .filter(
+        (f: string) =>
+          (f.endsWith(".jpg") || f.endsWith(".jpeg")) &&
+          !/_(thumb|mobile|full)\.jpe?g$/.test(f)
+      )
+      .sort((a: string, b: string) =>
+        a.localeCompare(b, undefined, { numeric: true })
+      )
+      .map((file: string) => `${baseUrl}${current.urlPrefix}/${file}`);
 
     res.json({
       code: 0,
       message: "获取成功",
       data: files,
+      complete: true,
     });
   } catch (error) {
     res.status(500).json({
@@ -280,15 +342,48 @@ app.get("/api/catalogue-images", async (req: Request, res: Response) => {
     // 只返回图片数据数组，按顺序排列
     const imageDataArray = images.map((img: any) => img.image_data);
 
+    // 每页的派生图（缩略图/移动端/完整图），客户端按显示宽度取最小的合适版本
+    const variantRows = await prisma.catalogue_image_variants.findMany({
+      where: { image_path: { in: imageDataArray } },
+      orderBy: [{ image_path: "asc" }, { width: "asc" }, { bytes: "asc" }],
+    });
+    const variants: Record<string, any[]> = {};
+    for (const row of variantRows) {
+      (variants[row.image_path] = variants[row.image_path] || []).push({
+        variant: row.variant,
+        format: row.format,
+        width: row.width,
+        height: row.height,
+        bytes: row.bytes,
+        url: row.variant_path,
+      });
+    }
+
+    // 分批发布中的目录：complete 为 false 的商店后续页面仍在生成，客户端可稍后刷新
+    const catalogues = await prisma.catalogues.findMany({
+      where: { is_current: true },
+      select: { store_name: true, is_complete: true, page_count: true },
+    });
+    const complete: Record<string, boolean> = {};
+    const pageCounts: Record<string, number> = {};
+    for (const catalogue of catalogues) {
+      complete[catalogue.store_name] = catalogue.is_complete;
+      pageCounts[catalogue.store_name] = catalogue.page_count;
+    }
+
     res.json({
       success: true,
       code: 0,
       message: "获取目录图片成功",
       data: imageDataArray,
+      variants,
       meta: {
         total: images.length,
         stores: [...new Set(images.map((img: any) => img.store_name))],
         lastUpdate: images.length > 0 ? images[0].week_date : null,
+        complete,
+        pageCounts,
+        loading: catalogues.some((catalogue: any) => !catalogue.is_complete),
       },
     });
 
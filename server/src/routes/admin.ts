@@ -7,6 +7,14 @@ import path from "path";
 import fs from "fs";
 import { exec } from "child_process";
 import { promisify } from "util";
+import {
+  VERSIONS_DIR,
+  createVersionDir,
+  currentCatalogueDir,
+  discardVersion,
+  flipCurrentVersion,
+  newVersionId,
+} from "../utils/catalogueVersions";
 
 const execAsync = promisify(exec);
 
@@ -49,9 +57,9 @@ router.get("/catalogue/status", requireAuth, async (req, res) => {
     const status: any = {};
 
     for (const store of stores) {
-      const imagesDir = path.join(
-        __dirname,
-        `../public/catalogue_images/${store}`
+      const { dir: imagesDir } = currentCatalogueDir(
+        path.join(__dirname, `../public/catalogue_images/${store}`),
+        `/catalogue_images/${store}`
       );
 
       if (fs.existsSync(imagesDir)) {
@@ -59,7 +67,8 @@ router.get("/catalogue/status", requireAuth, async (req, res) => {
           .readdirSync(imagesDir)
           .filter(
             (f) =>
-              f.endsWith(".jpg") || f.endsWith(".jpeg") || f.endsWith(".pdf")
+              (f.endsWith(".jpg") || f.endsWith(".jpeg") || f.endsWith(".pdf")) &&
+              !/_(thumb|mobile|full)\.jpe?g$/.test(f)
           )
           .sort();
 
@@ -151,32 +160,26 @@ router.post(
         fs.mkdirSync(imagesDir, { recursive: true });
       }
 
-      // 清理旧文件
-      const oldFiles = fs
-        .readdirSync(imagesDir)
-        .filter(
-          (f) => f.endsWith(".jpg") || f.endsWith(".jpeg") || f.endsWith(".pdf")
-        );
-
-      for (const file of oldFiles) {
-        fs.unlinkSync(path.join(imagesDir, file));
-      }
+      // 写入新的版本暂存目录，校验通过后才切换 current；失败时当前目录原样在线
+      const dateStr = new Date().toISOString().split("T")[0].replace(/-/g, "");
+      const version = newVersionId("upload");
+      const versionDir = createVersionDir(imagesDir, version);
+      const versionUrl = `/catalogue_images/${normalizedStore}/${VERSIONS_DIR}/${version}`;
 
       // 保存PDF文件
-      const dateStr = new Date().toISOString().split("T")[0].replace(/-/g, "");
       const pdfFileName = `${dateStr}_${normalizedStore}_catalogue.pdf`;
-      const pdfDestPath = path.join(imagesDir, pdfFileName);
-
-      // 复制PDF文件到目标目录
-      fs.copyFileSync(pdfPath, pdfDestPath);
+      const pdfDestPath = path.join(versionDir, pdfFileName);
 
       // 使用pdftoppm命令转换PDF为图片
       const outputPrefix = `${dateStr}_${normalizedStore}_page`;
-      const outputPath = path.join(imagesDir, outputPrefix);
+      const outputPath = path.join(versionDir, outputPrefix);
 
       let images: Array<{ path: string; name: string }> = [];
 
       try {
+        // 复制PDF文件到版本目录
+        fs.copyFileSync(pdfPath, pdfDestPath);
+
         // 执行pdftoppm命令
         await execAsync(
           `pdftoppm -jpeg -r 150 "${pdfDestPath}" "${outputPath}"`
@@ -184,15 +187,23 @@ router.post(
 
         // 获取生成的图片文件
         const generatedFiles = fs
-          .readdirSync(imagesDir)
+          .readdirSync(versionDir)
           .filter((f) => f.startsWith(outputPrefix) && f.endsWith(".jpg"))
           .sort();
 
-        images = generatedFiles.map((filename, index) => ({
-          path: path.join(imagesDir, filename),
+        images = generatedFiles.map((filename) => ({
+          path: path.join(versionDir, filename),
           name: filename,
         }));
 
+        // 校验：至少一页，且没有空文件
+        if (
+          images.length === 0 ||
+          images.some((image) => fs.statSync(image.path).size === 0)
+        ) {
+          throw new Error("转换结果为空");
+        }
+
         console.log(`PDF转换完成: ${pdfFileName} -> ${images.length}张图片`);
       } catch (error) {
         console.error("PDF转换失败:", error);
@@ -200,49 +211,43 @@ router.post(
           "错误详情:",
           error instanceof Error ? error.message : String(error)
         );
-        // 如果转换失败，创建一个占位图片
-        const placeholderImagePath = path.join(
-          imagesDir,
-          `${dateStr}_${normalizedStore}_placeholder.jpg`
-        );
-        const placeholderData = Buffer.from(
-          "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQEAYABgAAD/2wBDAAEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQH/2wBDAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQEBAQH/wAARCAABAAEDASIAAhEBAxEB/8QAFQABAQAAAAAAAAAAAAAAAAAAAAv/xAAUEAEAAAAAAAAAAAAAAAAAAAAA/8QAFQEBAQAAAAAAAAAAAAAAAAAAAAX/xAAUEQEAAAAAAAAAAAAAAAAAAAAA/9oADAMBAAIRAxAAPwA/8A",
-          "base64"
-        );
-        fs.writeFileSync(placeholderImagePath, placeholderData);
-
-        images = [
-          {
-            path: placeholderImagePath,
-            name: `${dateStr}_${normalizedStore}_placeholder.jpg`,
-          },
-        ];
-        console.log(`PDF转换失败，使用占位图片: ${pdfFileName}`);
+        discardVersion(imagesDir, version);
+        fs.unlinkSync(pdfPath);
+        return res.status(500).json({
+          success: false,
+          error: "PDF转换失败，当前目录保持不变",
+        });
       }
 
       // 清理临时PDF文件
       fs.unlinkSync(pdfPath);
 
-      // 更新数据库
+      // 单个事务内替换数据库记录，提交前读者看到的始终是旧目录
       const today = new Date();
+      await prisma.$transaction([
+        prisma.catalogue_images.deleteMany({
+          where: { store_name: normalizedStore },
+        }),
+        // 手动上传没有爬虫目录头，旧目录头（可能仍在分批发布中）不再是当前目录
+        prisma.catalogues.updateMany({
+          where: { store_name: normalizedStore, is_current: true },
+          data: { is_current: false },
+        }),
+        ...images.map((image, i) =>
+          prisma.catalogue_images.create({
+            data: {
+              store_name: normalizedStore,
+              page_number: i + 1,
+              image_data: `${versionUrl}/${image.name}`,
+              week_date: today,
+              version,
+            },
+          })
+        ),
+      ]);
 
-      // 删除旧的数据库记录
-      await prisma.catalogue_images.deleteMany({
-        where: { store_name: normalizedStore },
-      });
-
-      // 为每个图片页面插入数据库记录
-      for (let i = 0; i < images.length; i++) {
-        const image = images[i];
-        await prisma.catalogue_images.create({
-          data: {
-            store_name: normalizedStore,
-            page_number: i + 1,
-            image_data: `/catalogue_images/${normalizedStore}/${image.name}`,
-            week_date: today,
-          },
-        });
-      }
+      // 数据库生效后切换 current 指针
+      flipCurrentVersion(imagesDir, version);
 
       res.json({
         success: true,
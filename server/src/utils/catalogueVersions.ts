@@ -0,0 +1,71 @@
+import fs from "fs";
+import path from "path";
+
+// 与爬虫 catalogue_versions.py 使用相同的版本目录布局:
+// {商店目录}/versions/{版本号}/ 存放一次发布的全部图片，
+// {商店目录}/current -> versions/{版本号} 以及 current_version 文件指向当前版本
+export const VERSIONS_DIR = "versions";
+const CURRENT_LINK = "current";
+const CURRENT_FILE = "current_version";
+
+/** 版本号: 生成时间 + 后缀，如 20250605T100012-upload */
+export function newVersionId(suffix: string): string {
+  const stamp = new Date()
+    .toISOString()
+    .replace(/[-:]/g, "")
+    .replace(/\.\d+Z$/, "");
+  return `${stamp}-${suffix}`;
+}
+
+/** 新建版本暂存目录，current 切换前没有任何读者引用它 */
+export function createVersionDir(storeDir: string, version: string): string {
+  const dir = path.join(storeDir, VERSIONS_DIR, version);
+  fs.mkdirSync(dir, { recursive: true });
+  return dir;
+}
+
+/** 发布失败时删除暂存目录 */
+export function discardVersion(storeDir: string, version: string): void {
+  fs.rmSync(path.join(storeDir, VERSIONS_DIR, version), {
+    recursive: true,
+    force: true,
+  });
+}
+
+/** 原子切换 current：先建临时符号链接/文件，再 rename 覆盖 */
+export function flipCurrentVersion(storeDir: string, version: string): void {
+  const linkPath = path.join(storeDir, CURRENT_LINK);
+  const tempLink = `${linkPath}.tmp`;
+  try {
+    fs.rmSync(tempLink, { force: true });
+    fs.symlinkSync(path.join(VERSIONS_DIR, version), tempLink);
+    fs.renameSync(tempLink, linkPath);
+  } catch (error) {
+    console.warn("current 符号链接切换失败（仅更新版本文件）:", error);
+  }
+
+  const pointerPath = path.join(storeDir, CURRENT_FILE);
+  fs.writeFileSync(`${pointerPath}.tmp`, version);
+  fs.renameSync(`${pointerPath}.tmp`, pointerPath);
+}
+
+/** 当前版本的图片目录及其访问路径；还没有版本化发布过的商店返回商店目录本身 */
+export function currentCatalogueDir(
+  storeDir: string,
+  urlPrefix: string
+): { dir: string; urlPrefix: string } {
+  try {
+    const version = fs
+      .readFileSync(path.join(storeDir, CURRENT_FILE), "utf-8")
+      .trim();
+    if (version) {
+      return {
+        dir: path.join(storeDir, VERSIONS_DIR, version),
+        urlPrefix: `${urlPrefix}/${VERSIONS_DIR}/${version}`,
+      };
+    }
+  } catch {
+    // 没有 current_version 文件：旧的平铺目录
+  }
+  return { dir: storeDir, urlPrefix };
+}
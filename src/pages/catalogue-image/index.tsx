@@ -1,23 +1,62 @@
 import Taro, { useRouter } from "@tarojs/taro";
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { View, Text, Image, Swiper, SwiperItem } from "@tarojs/components";
 import { BASE_URL } from "../../config/env";
 import "./index.scss";
 
 interface CatalogueImage {
   id: string;
-  url: string;
+  url: string; // 原图，预览放大时使用
+  displayUrl: string; // 轮播显示用的派生图
   filename: string;
   store: string;
   title: string;
 }
 
+interface CatalogueVariant {
+  variant: string;
+  format: string;
+  width: number;
+  height: number;
+  bytes: number;
+  url: string;
+}
+
+// 取宽度不小于显示宽度的最小派生图，都不够宽时取最宽的；没有派生图时用原图
+const pickVariant = (
+  url: string,
+  variants: CatalogueVariant[] | undefined,
+  displayWidth: number
+) => {
+  if (!variants || variants.length === 0) {
+    return url;
+  }
+  const wideEnough = variants.filter((v) => v.width >= displayWidth);
+  if (wideEnough.length > 0) {
+    return wideEnough.reduce((a, b) => (b.bytes < a.bytes ? b : a)).url;
+  }
+  return variants.reduce((a, b) => (b.width > a.width ? b : a)).url;
+};
+
+// 目录分批发布中（complete 为 false）时，隔一段时间重新拉取已上线的页面
+const REFRESH_INTERVAL = 15000;
+
+interface CatalogueProgress {
+  complete: boolean;
+  total: number; // 整本目录的页数
+}
+
 const CatalogueImagePage = () => {
   const router = useRouter();
   const { id } = router.params;
   const [images, setImages] = useState<CatalogueImage[]>([]);
   const [currentIndex, setCurrentIndex] = useState(0);
   const [loading, setLoading] = useState(true);
+  const [progress, setProgress] = useState<CatalogueProgress>({
+    complete: true,
+    total: 0,
+  });
+  const refreshTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
 
   useEffect(() => {
     if (id) {
@@ -26,9 +65,30 @@ const CatalogueImagePage = () => {
     // eslint-disable-next-line react-hooks/exhaustive-deps
   }, [id]);
 
-  const loadCatalogueImages = async () => {
+  // 目录未发布完时定时刷新，发布完成或离开页面时停止
+  useEffect(() => {
+    if (progress.complete) {
+      return;
+    }
+    refreshTimer.current = setTimeout(
+      () => loadCatalogueImages(true),
+      REFRESH_INTERVAL
+    );
+    return () => {
+      if (refreshTimer.current) {
+        clearTimeout(refreshTimer.current);
+        refreshTimer.current = null;
+      }
+    };
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [progress]);
+
+  // refresh 为 true 时是后台刷新：不显示加载中，保留当前浏览的页
+  const loadCatalogueImages = async (refresh = false) => {
     try {
-      setLoading(true);
+      if (!refresh) {
+        setLoading(true);
+      }
       // 解析 catalogue ID，例如 catalogue_coles_0
       const match = id.match(/catalogue_(\w+)_(\d+)/);
       if (!match) {
@@ -47,17 +107,32 @@ const CatalogueImagePage = () => {
       });
 
       if (response.statusCode === 200 && response.data.code === 0) {
+        // 接口返回完整的图片地址，variants 按页面地址给出各尺寸派生图
+        const { windowWidth, pixelRatio } = Taro.getSystemInfoSync();
+        const displayWidth = windowWidth * pixelRatio;
+        const variants: Record<string, CatalogueVariant[]> =
+          response.data.variants || {};
         const catalogueImages = response.data.data.map(
-          (file: string, idx: number) => ({
+          (url: string, idx: number) => ({
             id: `catalogue_${store}_${idx}`,
-            url: `/catalogue_images/${store}/${file}`,
-            filename: file,
+            url,
+            displayUrl: pickVariant(url, variants[url], displayWidth),
+            filename: url.split("/").pop() || url,
             store,
             title: `${store.toUpperCase()} 打折信息 ${idx + 1}`,
           })
         );
         setImages(catalogueImages);
-        setCurrentIndex(parseInt(index) || 0);
+        setProgress({
+          complete: response.data.complete !== false,
+          total: response.data.total || catalogueImages.length,
+        });
+        if (!refresh) {
+          setCurrentIndex(parseInt(index) || 0);
+        }
+      } else if (refresh) {
+        // 后台刷新失败时保留已显示的页面，稍后再试
+        setProgress((current) => ({ ...current }));
       } else {
         // 如果API不存在，使用模拟数据
         // 从API获取图片数据
@@ -66,6 +141,10 @@ const CatalogueImagePage = () => {
       }
     } catch (error) {
       console.error("加载图片失败:", error);
+      if (refresh) {
+        setProgress((current) => ({ ...current }));
+        return;
+      }
       // 使用模拟数据作为后备
       const store = id.match(/catalogue_(\w+)_\d+/)?.[1] || "coles";
       // 从API获取图片数据
@@ -125,10 +204,19 @@ const CatalogueImagePage = () => {
           {images[currentIndex]?.title || "宣传图片"}
         </Text>
         <Text className="counter">
-          {currentIndex + 1} / {images.length}
+          {currentIndex + 1} / {progress.complete ? images.length : progress.total}
         </Text>
       </View>
 
+      {/* 分批发布中：提示还有页面在生成，定时刷新 */}
+      {!progress.complete && (
+        <View className="progress-banner">
+          <Text>
+            更多页面加载中：已上线 {images.length} / {progress.total} 页
+          </Text>
+        </View>
+      )}
+
       {/* 轮播图 */}
       <View className="swiper-container">
         <Swiper
@@ -149,9 +237,10 @@ const CatalogueImagePage = () => {
               >
                 <Image
                   className="catalogue-image"
-                  src={image.url}
+                  src={image.displayUrl}
                   mode="aspectFit"
                   lazyLoad={true}
+                  webp={true}
                 />
               </View>
             </SwiperItem>